@@ -0,0 +1,50 @@
+# coding=utf-8
+"""Compare `entities.from_columns` with serializing `Entity` objects.
+
+Usage: python -m benchmarks.bench_columns [entities count]
+"""
+
+import sys
+import timeit
+
+from pymaltego import entities, messages, serializers
+
+
+def columns(count):
+    return (
+        ['10.0.{}.{}'.format(i // 256, i % 256) for i in range(count)],
+        {
+            entities.Field('asn', None, matching_rule='strict'): list(
+                range(count)
+            ),
+            'country': ['NL'] * count,
+        }
+    )
+
+
+def with_entities(values, fields):
+    (asn, asns), (_, countries) = fields.items()
+    return serializers.to_xml(messages.TransformResponse([
+        entities.Entity('maltego.IPv4Address', value, fields=[
+            entities.Field('asn', asns[i], matching_rule='strict'),
+            entities.Field('country', countries[i]),
+        ])
+        for i, value in enumerate(values)
+    ]))
+
+
+def with_columns(values, fields):
+    return entities.from_columns('maltego.IPv4Address', values, fields)
+
+
+def main(count=100000):
+    data = columns(count)
+    xml = with_entities(*data)
+    assert with_columns(*data) in xml
+    for func in (with_entities, with_columns):
+        best = min(timeit.repeat(lambda: func(*data), number=1, repeat=3))
+        print('{:<16}{:>10.2f} ms'.format(func.__name__, best * 1000))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,65 @@
+# coding=utf-8
+"""Measure recording and GraphML export of `graph.GraphAccumulator`.
+
+Usage: python -m benchmarks.bench_graph [edges count]
+"""
+
+import io
+import sys
+import time
+
+from pymaltego import entities, graph
+
+
+def main(count=1000000):
+    sources = [
+        entities.Entity('maltego.Domain', 'domain{}.com'.format(i))
+        for i in range(count // 100 or 1)
+    ]
+    targets = [
+        entities.Entity('maltego.IPv4Address', '10.0.{}.{}'.format(
+            i // 256 % 256, i % 256
+        ))
+        for i in range(65536)
+    ]
+    properties = {graph.LINK_LABEL: 'resolves'}
+
+    accumulator = graph.GraphAccumulator()
+    started = time.time()
+    for i in range(count):
+        accumulator.add_edge(
+            sources[i % len(sources)], targets[i % len(targets)], properties
+        )
+    recorded = time.time() - started
+
+    accumulator = graph.GraphAccumulator()
+    started = time.time()
+    for i in range(0, count, 100):
+        accumulator.add_edges(
+            sources[i // 100],
+            targets[i % len(targets):i % len(targets) + 100], properties
+        )
+    bulk = time.time() - started
+
+    edge_bytes = sum(
+        array.itemsize * len(array) for array in (
+            accumulator.sources, accumulator.targets, accumulator.properties
+        )
+    )
+
+    started = time.time()
+    stream = io.BytesIO()
+    accumulator.write(stream)
+    written = time.time() - started
+
+    print('{:<16}{:>10.2f} s'.format('add_edge', recorded))
+    print('{:<16}{:>10.2f} s'.format('add_edges', bulk))
+    print('{:<16}{:>10.2f} s'.format('graphml', written))
+    print('{:<16}{:>10.2f} MB'.format('edge store', edge_bytes / 2.0 ** 20))
+    print('{:<16}{:>10.2f} MB'.format(
+        'output', len(stream.getvalue()) / 2.0 ** 20
+    ))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
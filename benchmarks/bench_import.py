@@ -0,0 +1,82 @@
+# coding=utf-8
+"""Startup cost of local transform execution.
+
+Reports `-X importtime` of `pymaltego.run` and wall time of a full
+`python -m pymaltego.run` call.
+
+Usage: python -m benchmarks.bench_import [runs]
+"""
+
+import subprocess
+import sys
+import time
+
+REQUEST = b'''<MaltegoMessage><MaltegoTransformRequestMessage><Entities>
+<Entity Type="EmailAddress"><Value>me@pyvim.com</Value></Entity>
+</Entities></MaltegoTransformRequestMessage></MaltegoMessage>'''
+
+TRANSFORM = 'benchmarks.bench_import:EmailToUsername'
+
+
+def import_times(module):
+    """Parse `-X importtime` output.
+
+    :returns: `list` of `(cumulative us, self us, module)` sorted by
+        cumulative time.
+    """
+    stderr = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import ' + module],
+        stderr=subprocess.PIPE, check=True
+    ).stderr.decode('utf-8')
+
+    times = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        times.append((int(cumulative), int(own), name.strip()))
+    return sorted(times, reverse=True)
+
+
+def run_time(runs):
+    """Best wall time of transform run in fresh process."""
+    best = None
+    for _ in range(runs):
+        started = time.time()
+        subprocess.run(
+            [sys.executable, '-m', 'pymaltego.run', TRANSFORM],
+            input=REQUEST, stdout=subprocess.PIPE, check=True
+        )
+        elapsed = time.time() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(runs=5):
+    for module in ('pymaltego.transforms', 'pymaltego.run'):
+        times = import_times(module)
+        print('{}: {:.2f} ms'.format(module, times[0][0] / 1000.0))
+        for cumulative, own, name in times[1:6]:
+            print('  {:<40}{:>8.2f} ms'.format(name, cumulative / 1000.0))
+
+    print('python -m pymaltego.run: {:.2f} ms'.format(run_time(runs) * 1000))
+
+
+def _transform():
+    from pymaltego import entities, transforms
+
+    class EmailToUsername(transforms.BaseTransform):
+
+        def transform(self):
+            return [
+                entities.Entity('Alias', entity.value.split('@')[0])
+                for entity in self.message.entities
+            ]
+
+    return EmailToUsername
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
+else:
+    EmailToUsername = _transform()
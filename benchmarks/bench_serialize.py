@@ -0,0 +1,107 @@
+# coding=utf-8
+"""Serialization of `TransformResponse` with many entities.
+
+`legacy` rebuilds entities with the former `Node` factory
+(`etree.Element` plus `append` and `str` conversion in `try`) to show
+the gain of the `etree.SubElement` construction path, `fast` is the
+string serializer without `lxml`.
+
+Usage: python -m benchmarks.bench_serialize [entities count ...]
+"""
+
+import sys
+import timeit
+
+from lxml import etree
+
+from pymaltego import entities, messages, serializers
+
+
+def legacy_node(name, value=None, parent=None, **kwargs):
+    element = etree.Element(name, **kwargs)
+    if value:
+        try:
+            element.text = str(value)
+        except UnicodeEncodeError:
+            element.text = u'{}'.format(value)
+    if parent is not None:
+        parent.append(element)
+    return element
+
+
+def legacy_entity(entity):
+    node = legacy_node('Entity')
+    node.attrib['Type'] = entity.name
+    legacy_node('Value', entity.value, parent=node)
+    if entity.weight is not None:
+        legacy_node('Weight', entity.weight, parent=node)
+    if entity.fields:
+        additional_fields = legacy_node('AdditionalFields', parent=node)
+        for field in entity.fields:
+            if field.value:
+                field_node = legacy_node('Field', field.value)
+                field_node.attrib['Name'] = field.name
+                field_node.attrib['DisplayName'] = field.display_name
+                if field.matching_rule is not None:
+                    field_node.attrib['MatchingRule'] = field.matching_rule
+                additional_fields.append(field_node)
+    if entity.labels:
+        labels = legacy_node('DisplayInformation', parent=node)
+        for label in entity.labels:
+            label_node = legacy_node('Label')
+            label_node.attrib['Name'] = label.name
+            label_node.attrib['Type'] = label.content_type
+            label_node.text = etree.CDATA(label.value)
+            labels.append(label_node)
+    if entity.icon_url:
+        legacy_node('IconURL', value=entity.icon_url, parent=node)
+    return node
+
+
+def build_entities(count):
+    return [
+        entities.Entity(
+            'maltego.IPv4Address', '10.{}.{}.{}'.format(
+                i // 65536, i // 256 % 256, i % 256
+            ),
+            weight=100,
+            fields=[
+                entities.Field('asn', i, matching_rule='strict'),
+                entities.Field('country', 'NL'),
+            ],
+            labels=[entities.Label('<b>{}</b>'.format(i))]
+        )
+        for i in range(count)
+    ]
+
+
+def legacy(items):
+    message = legacy_node('MaltegoMessage')
+    node = legacy_node('MaltegoTransformResponseMessage', parent=message)
+    entities_node = legacy_node('Entities', parent=node)
+    for entity in items:
+        entities_node.append(legacy_entity(entity))
+    return etree.tostring(message)
+
+
+def current(items):
+    return messages.TransformResponse(items).to_xml()
+
+
+def fast(items):
+    return serializers.to_xml(messages.TransformResponse(items))
+
+
+def main(*counts):
+    for count in counts or (10000, 100000):
+        items = build_entities(count)
+        assert legacy(items[:10]) == current(items[:10]) == fast(items[:10])
+
+        print('{} entities'.format(count))
+        for func in (legacy, current, fast):
+            best = min(timeit.repeat(lambda: func(items), number=1, repeat=3))
+            print('  {:<10}{:>10.2f} ms'.format(func.__name__, best * 1000))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
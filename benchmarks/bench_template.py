@@ -0,0 +1,54 @@
+# coding=utf-8
+"""Compare `EntityTemplate` stamping with building `Entity` objects.
+
+Usage: python -m benchmarks.bench_template [entities count]
+"""
+
+import sys
+import timeit
+
+from pymaltego import entities, messages
+
+FIELDS = [
+    entities.Field('asn', None, matching_rule='strict'),
+    entities.Field('country', None, 'Country Code'),
+    entities.Field('network', None),
+]
+LABELS = [entities.Label('<b>Enriched</b>')]
+
+
+def with_entities(count):
+    return messages.TransformResponse([
+        entities.Entity(
+            'maltego.IPv4Address', '10.0.0.{}'.format(i),
+            fields=[
+                entities.Field('asn', i, matching_rule='strict'),
+                entities.Field('country', 'NL', 'Country Code'),
+                entities.Field('network', '10.0.0.0/8'),
+            ],
+            labels=LABELS
+        )
+        for i in range(count)
+    ]).to_xml()
+
+
+def with_template(count):
+    template = entities.EntityTemplate(
+        'maltego.IPv4Address', FIELDS, LABELS
+    )
+    return messages.TransformResponse([
+        template.to_node('10.0.0.{}'.format(i), [i, 'NL', '10.0.0.0/8'])
+        for i in range(count)
+    ]).to_xml()
+
+
+def main(count=10000):
+    assert with_entities(10) == with_template(10)
+
+    for func in (with_entities, with_template):
+        best = min(timeit.repeat(lambda: func(count), number=1, repeat=3))
+        print('{:<16}{:>10.2f} ms'.format(func.__name__, best * 1000))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,60 @@
+# coding=utf-8
+"""Compare alternate wire codecs with lxml XML path.
+
+Usage: python -m benchmarks.bench_wire [entities count]
+"""
+
+import sys
+import timeit
+
+from lxml import etree
+
+from pymaltego import entities, messages, wire
+
+
+def build_response(count):
+    """Create response with typical entities."""
+    return messages.TransformResponse([
+        entities.Entity(
+            'maltego.IPv4Address', '10.0.{}.{}'.format(i // 256, i % 256),
+            weight='100',
+            fields=[
+                entities.Field('asn', str(i), matching_rule='strict'),
+                entities.Field('country', 'NL'),
+            ],
+            labels=[entities.Label('<b>{}</b>'.format(i))]
+        )
+        for i in range(count)
+    ], [entities.UIMessage('Done', 'Inform')])
+
+
+def bench(name, func, number):
+    """Print best time of function."""
+    best = min(timeit.repeat(func, number=number, repeat=3)) / number
+    print('{:<24}{:>10.2f} ms'.format(name, best * 1000))
+
+
+def main(count=10000):
+    response = build_response(count)
+    xml = response.to_xml()
+    print('{} entities, XML {} bytes'.format(count, len(xml)))
+
+    bench('xml encode', response.to_xml, 3)
+    bench(
+        'xml decode',
+        lambda: messages.TransformResponse.from_node(etree.fromstring(xml)),
+        3
+    )
+
+    for name in sorted(wire.codecs):
+        payload = response.to_wire(name)
+        print('{} payload {} bytes'.format(name, len(payload)))
+        bench('{} encode'.format(name), lambda: response.to_wire(name), 3)
+        bench(
+            '{} decode'.format(name),
+            lambda: messages.TransformResponse.from_wire(payload, name), 3
+        )
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
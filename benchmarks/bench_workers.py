@@ -0,0 +1,60 @@
+# coding=utf-8
+"""Compare pickled `Entity` results of process pool with XML fragments.
+
+Usage: python -m benchmarks.bench_workers [entities per task] [tasks]
+"""
+
+import sys
+import timeit
+
+from pymaltego import entities, messages, serializers, workers
+
+
+def expand(prefix, count):
+    return [
+        entities.Entity(
+            'maltego.IPv4Address', '{}.{}'.format(prefix, i),
+            fields=[entities.Field('asn', i, matching_rule='strict')]
+        )
+        for i in range(count)
+    ]
+
+
+class Expand(object):
+
+    def __init__(self, count):
+        self.count = count
+
+    def __call__(self, prefix):
+        return expand(prefix, self.count)
+
+
+def with_objects(pool, func, prefixes):
+    results = pool.executor.map(func, prefixes)
+    return serializers.to_xml(messages.TransformResponse(
+        [entity for result in results for entity in result]
+    ))
+
+
+def with_fragments(pool, func, prefixes):
+    return serializers.to_xml(messages.TransformResponse(
+        list(pool.map(func, prefixes))
+    ))
+
+
+def main(count=20000, tasks=8):
+    func = Expand(count)
+    prefixes = ['10.0.{}'.format(i) for i in range(tasks)]
+    with workers.WorkerPool() as pool:
+        assert with_objects(pool, func, prefixes) == with_fragments(
+            pool, func, prefixes
+        )
+        for bench in (with_objects, with_fragments):
+            best = min(timeit.repeat(
+                lambda: bench(pool, func, prefixes), number=1, repeat=3
+            ))
+            print('{:<16}{:>10.2f} ms'.format(bench.__name__, best * 1000))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,168 @@
+# coding=utf-8
+
+import collections
+import threading
+
+from . import metrics
+
+DIGEST_SIZE = 16
+
+
+class LRUCache(object):
+
+    """Bounded thread-safe least recently used cache."""
+
+    def __init__(self, maxsize=128):
+        """Override initialization instance.
+
+        :param maxsize (optional): `int` max count of items.
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._items = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    @property
+    def hit_rate(self):
+        """Get share of lookups found in cache.
+
+        :returns: `float` from 0 to 1.
+        """
+        total = self.hits + self.misses
+        return float(self.hits) / total if total else 0.0
+
+    def get(self, key, default=None):
+        """Get item and mark it as recently used.
+
+        :param key: hashable key.
+        :param default (optional): value for missing key.
+        :returns: cached value or default.
+        """
+        with self._lock:
+            try:
+                value = self._items[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """Put item, evicting least recently used items.
+
+        :param key: hashable key.
+        :param value: cached value.
+        """
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        """Remove all items and reset counters."""
+        with self._lock:
+            self._items.clear()
+            self.hits = self.misses = 0
+
+
+def payload_key(xml):
+    """Digest of raw request payload.
+
+    :param xml: `bytes` or `str` payload.
+    :returns: `bytes` digest.
+    """
+    import hashlib
+
+    if isinstance(xml, str):
+        xml = xml.encode('utf-8')
+    return hashlib.blake2b(xml, digest_size=DIGEST_SIZE).digest()
+
+
+def _lookup(cache, name, key):
+    """Get cached value and emit hit or miss metric."""
+    value = cache.get(key)
+    metrics.emit(
+        'cache.miss' if value is None else 'cache.hit', 1, cache=name
+    )
+    return value
+
+
+class RequestCache(object):
+
+    """Frozen parsed requests keyed by digest of payload.
+
+    Requests parsed with other limits or validator are cached apart, so
+    every transform gets requests checked with its own limits.
+    """
+
+    def __init__(self, maxsize=1024):
+        """Override initialization instance.
+
+        :param maxsize (optional): `int` max count of requests.
+        """
+        self.cache = LRUCache(maxsize)
+
+    def parse(self, xml, key=None, validate=False, limits=None):
+        """Parse request or get it from cache.
+
+        :param xml: `bytes` or `str` XML.
+        :param key (optional): `bytes` digest of payload, computed
+            by default.
+        :param validate (optional): `bool` or `validation.Validator`
+            instance, see `TransformRequest.from_xml`.
+        :param limits (optional): `guards.SizeLimits` instance.
+        :returns: `messages.FrozenTransformRequest` instance, shared by
+            all callers.
+        """
+        from pymaltego import messages
+
+        if key is None:
+            key = payload_key(xml)
+        key = (key, limits, validate)
+
+        message = _lookup(self.cache, 'request', key)
+        if message is None:
+            message = messages.TransformRequest.from_xml(
+                xml, validate, limits
+            ).freeze()
+            self.cache.set(key, message)
+        return message
+
+
+class ResponseCache(object):
+
+    """Serialized responses keyed by transform and digest of payload."""
+
+    def __init__(self, maxsize=1024):
+        """Override initialization instance.
+
+        :param maxsize (optional): `int` max count of responses.
+        """
+        self.cache = LRUCache(maxsize)
+
+    def get(self, name, key):
+        """Get cached response.
+
+        :param name: `str` qualified transform name.
+        :param key: `bytes` digest of payload.
+        :returns: `bytes` XML or `None`.
+        """
+        return _lookup(self.cache, 'response', (name, key))
+
+    def set(self, name, key, xml):
+        """Save response.
+
+        :param name: `str` qualified transform name.
+        :param key: `bytes` digest of payload.
+        :param xml: `bytes` XML.
+        """
+        self.cache.set((name, key), xml)
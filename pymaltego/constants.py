@@ -2,3 +2,6 @@
 
 DEFAULT_SOFT_LIMIT = 12
 DEFAULT_HARD_LIMIT = 12
+DEFAULT_LOCAL_ENTITY_TYPE = 'maltego.Unknown'
+ASYNC_PARSE_THRESHOLD = 64 * 1024
+ASYNC_SERIALIZE_THRESHOLD = 500
@@ -0,0 +1,238 @@
+# coding=utf-8
+
+import hashlib
+import sqlite3
+import threading
+
+from lxml import etree
+
+from . import cache, entities
+
+DIGEST_SIZE = 16
+
+
+def xml_fingerprint(xml):
+    """Digest of serialized entity XML.
+
+    :param xml: `bytes` entity XML.
+    :returns: `bytes` digest.
+    """
+    return hashlib.blake2b(xml, digest_size=DIGEST_SIZE).digest()
+
+
+def request_key(name, message, scope=None):
+    """Key of transform input.
+
+    :param name: `str` qualified transform name.
+    :param message: `messages.TransformRequest` instance.
+    :param scope (optional): `str` caller scope, e.g. graph or session
+        id, callers of other scopes never share state.
+    :returns: `str` key.
+    """
+    digest = hashlib.blake2b(name.encode('utf-8'), digest_size=DIGEST_SIZE)
+    digest.update(repr(scope).encode('utf-8'))
+    for entity in sorted(
+            (
+                entity.name, entities.text(entity.value), sorted(
+                    (field.name, entities.text(field.value))
+                    for field in entity.fields
+                )
+            )
+            for entity in message.entities):
+        digest.update(repr(entity).encode('utf-8'))
+    digest.update(repr(sorted(message.fields.items())).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class MemoryFingerprintStore(object):
+
+    """Fingerprints of previous results in memory.
+
+    Only `maxsize` recently used keys are kept, results of evicted keys
+    are new entities again.
+    """
+
+    def __init__(self, maxsize=1024):
+        """Override initialization instance.
+
+        :param maxsize (optional): `int` max count of keys.
+        """
+        self._fingerprints = cache.LRUCache(maxsize)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Get fingerprints of previous result.
+
+        :param key: `str` request key.
+        :returns: `set` of `bytes` digests.
+        """
+        with self._lock:
+            return set(self._fingerprints.get(key, ()))
+
+    def set(self, key, fingerprints):
+        """Save fingerprints of result.
+
+        :param key: `str` request key.
+        :param fingerprints: iterable of `bytes` digests.
+        """
+        with self._lock:
+            self._fingerprints.set(key, frozenset(fingerprints))
+
+    def update(self, key, func):
+        """Atomically update fingerprints of key.
+
+        :param key: `str` request key.
+        :param func: callable `func(fingerprints)` returns
+            `(fingerprints, result)`, nothing is saved if it raises.
+        :returns: result of `func`.
+        """
+        with self._lock:
+            fingerprints, result = func(
+                set(self._fingerprints.get(key, ()))
+            )
+            self._fingerprints.set(key, frozenset(fingerprints))
+        return result
+
+
+class SQLiteFingerprintStore(object):
+
+    """Fingerprints of previous results in SQLite database."""
+
+    def __init__(self, path):
+        """Override initialization instance.
+
+        :param path: `str` path to SQLite database file.
+        """
+        self.path = path
+        self._local = threading.local()
+        self._connection().execute(
+            'CREATE TABLE IF NOT EXISTS fingerprints'
+            ' (key TEXT PRIMARY KEY, digests BLOB NOT NULL)'
+        )
+
+    def _connection(self):
+        """Get connection of current thread.
+
+        :returns: `sqlite3.Connection` instance.
+        """
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, isolation_level=None)
+            self._local.connection = connection
+        return connection
+
+    def get(self, key):
+        """Get fingerprints of previous result.
+
+        :param key: `str` request key.
+        :returns: `set` of `bytes` digests.
+        """
+        return self._get(self._connection(), key)
+
+    def _get(self, connection, key):
+        """Get fingerprints with connection."""
+        row = connection.execute(
+            'SELECT digests FROM fingerprints WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None:
+            return set()
+        digests = row[0]
+        return {
+            digests[i:i + DIGEST_SIZE]
+            for i in range(0, len(digests), DIGEST_SIZE)
+        }
+
+    def set(self, key, fingerprints):
+        """Save fingerprints of result.
+
+        :param key: `str` request key.
+        :param fingerprints: iterable of `bytes` digests.
+        """
+        self._set(self._connection(), key, fingerprints)
+
+    def _set(self, connection, key, fingerprints):
+        """Save fingerprints with connection."""
+        connection.execute(
+            'INSERT OR REPLACE INTO fingerprints (key, digests) VALUES (?, ?)',
+            (key, b''.join(sorted(fingerprints)))
+        )
+
+    def update(self, key, func):
+        """Atomically update fingerprints of key in one transaction.
+
+        :param key: `str` request key.
+        :param func: callable `func(fingerprints)` returns
+            `(fingerprints, result)`, transaction is rolled back if
+            it raises.
+        :returns: result of `func`.
+        """
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            fingerprints, result = func(self._get(connection, key))
+            self._set(connection, key, fingerprints)
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        return result
+
+
+def _iter_nodes(items):
+    """Iterate entity nodes of items."""
+    for entity in items:
+        if etree.iselement(entity):
+            yield entity
+        elif isinstance(entity, (bytes, entities.Fragment)):
+            if isinstance(entity, bytes):
+                entity = entities.Fragment(entity)
+            for node in entity.to_nodes():
+                yield node
+        else:
+            yield entity.to_node()
+
+
+def changed(store, key, items, limits=None):
+    """Select new or changed entities.
+
+    Fingerprints are compared and saved atomically by `store.update`,
+    after selected entities are serialized and checked against limits,
+    so entities of failed response are sent again next time.
+
+    :param store: fingerprint store.
+    :param key: `str` request key.
+    :param items: iterable of `entities.Entity` instances, entity nodes,
+        `entities.Fragment` instances or `bytes` of serialized entities.
+    :param limits (optional): `guards.SizeLimits` instance.
+    :returns: `tuple` of `list` entity nodes to send and `int` count of
+        unchanged entities.
+    """
+    serialized = []
+    for node in _iter_nodes(items):
+        xml = etree.tostring(node)
+        serialized.append((node, xml, xml_fingerprint(xml)))
+
+    def select(previous):
+        current = set()
+        nodes = []
+        size = 0
+        unchanged = 0
+
+        for node, xml, digest in serialized:
+            if digest in current:
+                continue
+            current.add(digest)
+            if digest in previous:
+                unchanged += 1
+                continue
+
+            nodes.append(node)
+            size += len(xml)
+            if limits is not None:
+                limits.check_entities(len(nodes))
+                limits.check_entity(node)
+                limits.check_bytes(size)
+
+        return current, (nodes, unchanged)
+
+    return store.update(key, select)
@@ -0,0 +1,127 @@
+# coding=utf-8
+
+from concurrent import futures
+
+from . import entities, exceptions, guards, messages, serializers
+
+
+class Dispatcher(object):
+
+    """Run several transforms on one parsed request."""
+
+    def __init__(self, transforms, max_workers=None):
+        """Override initialization instance.
+
+        :param transforms: `list` of `transforms.BaseTransform` subclasses.
+        :param max_workers (optional): `int` threads, default is count of
+            transforms.
+        """
+        self.transforms = list(transforms)
+        self.max_workers = max_workers or len(self.transforms) or 1
+
+    def run(self, message, merge=True):
+        """Run all transforms concurrently.
+
+        :param message: `messages.TransformRequest` instance or `str` XML,
+            frozen and shared by all transforms.
+        :param merge (optional): `bool` merge results in one response.
+        :returns: merged `messages.TransformResponse` instance or `dict`
+            transform name to response.
+        """
+        if not isinstance(message, messages.MaltegoMessage):
+            message = messages.TransformRequest.from_xml(message)
+        message = message.freeze()
+
+        with futures.ThreadPoolExecutor(self.max_workers) as executor:
+            results = list(executor.map(
+                lambda transform: self.respond(transform, message),
+                self.transforms
+            ))
+
+        if not merge:
+            return dict(
+                (transform.__name__, response)
+                for transform, response in zip(self.transforms, results)
+            )
+        return self.merge(results)
+
+    def respond(self, transform, message):
+        """Run transform in worker thread.
+
+        Entities are consumed and checked against limits of transform
+        by `to_response`, its errors become exception messages.
+
+        :param transform: `transforms.BaseTransform` subclass.
+        :param message: `messages.TransformRequest` instance.
+        :returns: `messages.TransformResponse` or
+            `messages.TransformException` instance.
+        """
+        return transform(message).to_response()
+
+    def merge(self, results):
+        """Merge responses of transforms.
+
+        Errors of failed transforms become `PartialError` UI messages,
+        if all transforms failed errors are returned as exception message.
+
+        :param results: `list` of `messages.TransformResponse` or
+            `messages.TransformException` instances.
+        :returns: `messages.TransformResponse` or
+            `messages.TransformException` instance.
+        """
+        items = []
+        ui_messages = []
+        errors = []
+        failed = 0
+
+        for response in results:
+            ui_messages.extend(response.ui_messages)
+            if isinstance(response, messages.TransformException):
+                errors.extend(response.errors)
+                failed += 1
+            else:
+                items.extend(response.entities)
+
+        if failed and failed == len(results):
+            return messages.TransformException(errors, ui_messages)
+
+        for message, _ in errors:
+            ui_messages.append(entities.UIMessage(message, 'PartialError'))
+        return messages.TransformResponse(
+            items, ui_messages, limits=self.limits(results)
+        )
+
+    def limits(self, results):
+        """Get payload limit of merged response, the smallest of responses.
+
+        :param results: `list` of `messages.TransformResponse` or
+            `messages.TransformException` instances.
+        :returns: `guards.SizeLimits` instance or `None`.
+        """
+        sizes = [
+            response.limits.max_bytes for response in results
+            if getattr(response, 'limits', None) is not None and
+            response.limits.max_bytes is not None
+        ]
+        if not sizes:
+            return None
+        return guards.SizeLimits(max_bytes=min(sizes))
+
+    def handle(self, xml, merge=True):
+        """Parse request once and run all transforms.
+
+        :param xml: `str` XML request.
+        :param merge (optional): `bool` merge results in one response.
+        :returns: `str` XML response or `dict` transform name to XML,
+            malformed request gives exception message.
+        """
+        try:
+            result = self.run(xml, merge)
+            if merge:
+                return serializers.to_xml(result)
+            return dict(
+                (name, serializers.to_xml(item))
+                for name, item in result.items()
+            )
+        except exceptions.PyMaltegoException as e:
+            return messages.TransformException.from_exception(e).to_xml()
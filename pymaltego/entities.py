@@ -1,10 +1,35 @@
 # coding=utf-8
 
-import re
-
-from lxml import etree
+import copy
 
 from . import exceptions
+from .lazy import LazyModule
+
+etree = LazyModule('lxml.etree')
+html = LazyModule('html')
+re = LazyModule('re')
+string = LazyModule('string')
+
+
+def text(value):
+    """Convert node value to text.
+
+    :param value: node value.
+    :returns: `str` text.
+    """
+    return value if isinstance(value, str) else str(value)
+
+
+def element(name, parent=None):
+    """Create node, as child of parent if passed.
+
+    :param name: name of node.
+    :param parent (optional): `etree.Element` instance parent of node.
+    :returns: `etree.Element` instance.
+    """
+    if parent is None:
+        return etree.Element(name)
+    return etree.SubElement(parent, name)
 
 
 class Node(object):
@@ -18,18 +43,15 @@ class Node(object):
         :param value (optional): `str` text of node.
         :param parent (optional): `etree.Element` instance parent of node.
         """
-        element = etree.Element(name, **kwargs)
+        if parent is None:
+            node = etree.Element(name, **kwargs)
+        else:
+            node = etree.SubElement(parent, name, **kwargs)
 
         if value:
-            try:
-                element.text = str(value)
-            except UnicodeEncodeError:
-                element.text = u'{}'.format(value)
-
-        if parent is not None:
-            parent.append(element)
+            node.text = text(value)
 
-        return element
+        return node
 
 
 class XMLObject(object):
@@ -65,6 +87,116 @@ class XMLObject(object):
         """
         return etree.tostring(self.to_node(), pretty_print=pretty_print)
 
+    @classmethod
+    def from_wire(cls, payload, codec='json'):
+        """Create object from alternate wire format.
+
+        :param payload: `bytes` payload.
+        :param codec (optional): `str` codec name registered in `wire`.
+        :returns: instance of class.
+        """
+        from . import wire
+
+        instance = wire.decode(payload, codec)
+        if not isinstance(instance, cls):
+            raise ValueError(
+                'Payload is not a "{}" object.'.format(cls.__name__)
+            )
+        return instance
+
+    def to_wire(self, codec='json'):
+        """Serialize to alternate wire format.
+
+        :param codec (optional): `str` codec name registered in `wire`.
+        :returns: `bytes` payload.
+        """
+        from . import wire
+
+        return wire.encode(self, codec)
+
+
+def frozen(cls, obj, **attributes):
+    """Create read-only copy of object.
+
+    :param cls: `entities.Frozen` subclass.
+    :param obj: object copied.
+    :param attributes: `dict` replaced attributes.
+    :returns: instance of `cls`.
+    """
+    instance = cls.__new__(cls)
+    instance.__dict__.update(obj.__dict__)
+    instance.__dict__.update(attributes)
+    return instance
+
+
+class Frozen(object):
+
+    """Read-only hashable view of object, safe to share between threads."""
+
+    def __setattr__(self, name, value):
+        raise AttributeError(
+            '{} is frozen, use `thaw()` to get mutable copy.'.format(
+                self.__class__.__name__
+            )
+        )
+
+    __delattr__ = __setattr__
+
+    def _key(self):
+        """Get values identifying object.
+
+        :returns: `tuple` of hashable values.
+        """
+        return tuple(sorted(
+            item for item in self.__dict__.items()
+            if not item[0].startswith('_')
+        ))
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self._key() == other._key()
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        try:
+            return self.__dict__['_hash']
+        except KeyError:
+            value = hash((self.__class__.__name__, self._key()))
+            self.__dict__['_hash'] = value
+            return value
+
+    def freeze(self):
+        """Get read-only object.
+
+        :returns: self.
+        """
+        return self
+
+    def thaw(self, **changes):
+        """Create mutable copy, copy-on-write for derived objects.
+
+        :param changes: `dict` attributes of copy to replace, other
+            attributes are copied as is.
+        :returns: instance of mutable base class.
+        """
+        # Frozen classes are declared as `FrozenX(Frozen, X)`.
+        cls = self.__class__.__bases__[-1]
+        instance = cls.__new__(cls)
+        instance.__dict__.update(
+            item for item in self.__dict__.items()
+            if not item[0].startswith('_')
+        )
+        instance.__dict__.update(changes)
+        return instance
+
+    def to_node(self, *args, **kwargs):
+        """Serialize mutable copy to `etree.Element` instance.
+
+        :returns: `etree.Element` instance.
+        """
+        return self.thaw().to_node(*args, **kwargs)
+
 
 class Label(XMLObject):
 
@@ -81,6 +213,13 @@ class Label(XMLObject):
         self.value = value
         self.content_type = content_type
 
+    def freeze(self):
+        """Create read-only hashable copy.
+
+        :returns: `entities.FrozenLabel` instance.
+        """
+        return frozen(FrozenLabel, self)
+
     @classmethod
     def from_node(cls, node):
         """Load values from node.
@@ -91,19 +230,23 @@ class Label(XMLObject):
         super(Label, cls).from_node(node)
 
         return cls(
-            node.attrib['Name'], node.text.strip(), node.attrib.get('Type', '')
+            (node.text or '').strip(), node.attrib['Name'],
+            node.attrib.get('Type', '')
         )
 
-    def to_node(self):
+    def to_node(self, parent=None):
         """Serialize to `etree.Element` instance.
 
+        :param parent (optional): `etree.Element` instance parent of node.
         :returns: `etree.Element` instance.
         """
-        node = Node(self.__class__.__name__)
-
-        node.attrib['Name'] = self.name
-        node.attrib['Type'] = self.content_type
-        node.text = etree.CDATA(self.value)
+        node = element(self.__class__.__name__, parent)
+        node.set('Name', self.name)
+        node.set('Type', self.content_type)
+        if ']]>' in self.value:
+            node.text = self.value
+        else:
+            node.text = etree.CDATA(self.value)
 
         return node
 
@@ -127,6 +270,13 @@ class Field(XMLObject):
         ).title()
         self.matching_rule = matching_rule
 
+    def freeze(self):
+        """Create read-only hashable copy.
+
+        :returns: `entities.FrozenField` instance.
+        """
+        return frozen(FrozenField, self)
+
     @classmethod
     def from_node(cls, node):
         """Load values from node.
@@ -137,22 +287,24 @@ class Field(XMLObject):
         super(Field, cls).from_node(node)
 
         return cls(
-            node.attrib['Name'], node.text.strip(),
+            node.attrib['Name'], (node.text or '').strip(),
             node.attrib.get('DisplayName'), node.attrib.get('MatchingRule')
         )
 
-    def to_node(self):
+    def to_node(self, parent=None):
         """Serialize to `etree.Element` instance.
 
+        :param parent (optional): `etree.Element` instance parent of node.
         :returns: `etree.Element` instance.
         """
-        node = Node(self.__class__.__name__, self.value)
-
-        node.attrib['Name'] = self.name
-        node.attrib['DisplayName'] = self.display_name
-
+        node = element(self.__class__.__name__, parent)
+        node.set('Name', self.name)
+        node.set('DisplayName', self.display_name)
         if self.matching_rule is not None:
-            node.attrib['MatchingRule'] = self.matching_rule
+            node.set('MatchingRule', self.matching_rule)
+
+        if self.value:
+            node.text = text(self.value)
 
         return node
 
@@ -179,6 +331,17 @@ class Entity(XMLObject):
         self.fields = fields or []
         self.labels = labels or []
 
+    def freeze(self):
+        """Create read-only hashable copy with frozen fields and labels.
+
+        :returns: `entities.FrozenEntity` instance.
+        """
+        return frozen(
+            FrozenEntity, self,
+            fields=tuple(field.freeze() for field in self.fields),
+            labels=tuple(label.freeze() for label in self.labels)
+        )
+
     @classmethod
     def from_node(cls, node):
         """Load values from node.
@@ -203,7 +366,7 @@ class Entity(XMLObject):
 
         weight = node.find('Weight')
         if weight is not None:
-            instance.weight = weight.text and weight.text.strip()
+            instance.weight = (weight.text or '').strip()
 
         additional_fields = node.find('AdditionalFields')
         if additional_fields is not None:
@@ -223,35 +386,442 @@ class Entity(XMLObject):
 
         return instance
 
-    def to_node(self):
+    def to_node(self, parent=None):
         """Serialize to `etree.Element` instance.
 
+        :param parent (optional): `etree.Element` instance parent of node.
         :returns: `etree.Element` instance.
         """
-        node = Node(self.__class__.__name__)
-        node.attrib['Type'] = self.name
+        node = element(self.__class__.__name__, parent)
+        node.set('Type', self.name)
+        sub_element = etree.SubElement
 
-        Node('Value', self.value, parent=node)
+        value = sub_element(node, 'Value')
+        if self.value:
+            value.text = text(self.value)
 
         if self.weight is not None:
-            Node('Weight', self.weight, parent=node)
+            weight = sub_element(node, 'Weight')
+            if self.weight:
+                weight.text = text(self.weight)
 
-        if self.fields:
-            additional_fields = Node('AdditionalFields', parent=node)
-            for field in self.fields:
-                if field.value:
-                    additional_fields.append(field.to_node())
+        fields = [field for field in self.fields if field.value]
+        if fields:
+            additional_fields = sub_element(node, 'AdditionalFields')
+            for field in fields:
+                field.to_node(additional_fields)
 
         if self.labels:
-            labels = Node('DisplayInformation', parent=node)
+            labels = sub_element(node, 'DisplayInformation')
             for label in self.labels:
-                labels.append(label.to_node())
+                label.to_node(labels)
 
         if self.icon_url:
-            Node('IconURL', value=self.icon_url, parent=node)
+            sub_element(node, 'IconURL').text = text(self.icon_url)
+
+        return node
+
+
+class FrozenLabel(Frozen, Label):
+
+    """Read-only label, created by `Label.freeze()`."""
+
+
+class FrozenField(Frozen, Field):
+
+    """Read-only field, created by `Field.freeze()`."""
+
+
+class FrozenEntity(Frozen, Entity):
+
+    """Read-only entity, created by `Entity.freeze()`."""
+
+    def thaw(self, **changes):
+        """Create mutable copy, copy-on-write for derived entities.
+
+        :param changes: `dict` attributes of copy to replace, fields and
+            labels not replaced are thawed too.
+        :returns: `entities.Entity` instance.
+        """
+        changes.setdefault('fields', [field.thaw() for field in self.fields])
+        changes.setdefault('labels', [label.thaw() for label in self.labels])
+        return super(FrozenEntity, self).thaw(**changes)
+
+
+class LabelTemplate(object):
+
+    """HTML label compiled once, rendered per entity with escaped values."""
+
+    def __init__(self, template, name='Details', content_type='text/html'):
+        """Override initialization instance.
+
+        :param template: `str` HTML with `{name}` placeholders of entity
+            `value` and field names, format spec and conversion are
+            allowed as in `str.format`.
+        :param name (optional): `str` label name.
+        :param content_type (optional): `str` label content type.
+        """
+        self.template = template
+        self.name = name
+        self.content_type = content_type
+        self._head = None
+
+        expressions = []
+        for literal, field, spec, conversion in string.Formatter().parse(
+                template):
+            if literal:
+                expressions.append(repr(literal))
+            if field is None:
+                continue
+            if not field or field.isdigit():
+                raise ValueError(
+                    'Positional placeholders are not supported: "{}".'.format(
+                        template
+                    )
+                )
+            expressions.append('escape(values.get({!r}), {!r}, {!r})'.format(
+                field, spec, conversion
+            ))
+
+        self._render = eval(
+            'lambda values: "".join([{}])'.format(', '.join(expressions)),
+            {'escape': _escape_value}
+        )
+
+    def render(self, values=None, **kwargs):
+        """Render label value.
+
+        :param values (optional): `dict` placeholder values, missing
+            and `None` values are rendered empty.
+        :param kwargs: placeholder values.
+        :returns: `str` HTML.
+        """
+        if kwargs:
+            values = dict(values or {}, **kwargs)
+        elif values is None:
+            values = {}
+        return self._render(values)
+
+    def to_label(self, values=None, **kwargs):
+        """Render label.
+
+        :returns: `entities.Label` instance.
+        """
+        return Label(
+            self.render(values, **kwargs), self.name, self.content_type
+        )
+
+    def xml(self, values=None, **kwargs):
+        """Render label XML for fast serializer.
+
+        Result is equal to serialized `to_label()`.
+
+        :returns: `str` XML.
+        """
+        from pymaltego import serializers
+
+        if self._head is None:
+            self._head = '<Label Name="{}" Type="{}">'.format(
+                serializers.escape_attribute(self.name),
+                serializers.escape_attribute(self.content_type)
+            )
+        return '{}{}</Label>'.format(
+            self._head, serializers.cdata(self.render(values, **kwargs))
+        )
+
+
+CONVERSIONS = {'r': repr, 's': str, 'a': ascii}
+
+
+def _escape_value(value, spec, conversion):
+    """Format and escape placeholder value of `LabelTemplate`."""
+    if value is None:
+        return ''
+    if conversion:
+        value = CONVERSIONS[conversion](value)
+    if spec:
+        value = format(value, spec)
+    elif not isinstance(value, str):
+        value = str(value)
+    return html.escape(value)
+
+
+class EntityTemplate(object):
+
+    """Prebuilt skeleton of entities with the same type, fields and labels."""
+
+    def __init__(self, name, fields=None, labels=None, weight=None,
+                 icon_url=None):
+        """Override initialization instance.
+
+        :param name: `str` entity name.
+        :param fields (optional): `list` of `entities.Field` instances or
+            `str` names, values are set on render.
+        :param labels (optional): `list` of `entities.Label` instances.
+        :param weight (optional): `str` entity weight.
+        :param icon_url (optional): `str` entity icon url.
+        """
+        fields = [
+            field if isinstance(field, Field) else Field(field, None)
+            for field in fields or []
+        ]
+        self.field_names = [field.name for field in fields]
+
+        skeleton = [
+            Field(field.name, ' ', field.display_name, field.matching_rule)
+            for field in fields
+        ]
+        self.node = Entity(
+            name, None, weight, icon_url, skeleton, labels
+        ).to_node()
+        self._fields_index = (
+            self.node.index(self.node.find('AdditionalFields'))
+            if fields else None
+        )
+
+    def to_node(self, value, fields=None):
+        """Stamp entity node.
+
+        Result is equal to `Entity.to_node` of entity with the same values.
+
+        :param value: `str` entity value.
+        :param fields (optional): `dict` field name to value or `list`
+            values in order of template fields, missing values are skipped.
+        :returns: `etree.Element` instance.
+        """
+        node = copy.deepcopy(self.node)
+
+        if value:
+            node[0].text = value if isinstance(value, str) else str(value)
+
+        if self._fields_index is not None:
+            if fields is None:
+                fields = ()
+            elif isinstance(fields, dict):
+                fields = [fields.get(name) for name in self.field_names]
+
+            fields_node = node[self._fields_index]
+            field_nodes = list(fields_node)
+            for index, field_node in enumerate(field_nodes):
+                field_value = fields[index] if index < len(fields) else None
+                if field_value:
+                    field_node.text = (
+                        field_value if isinstance(field_value, str)
+                        else str(field_value)
+                    )
+                else:
+                    fields_node.remove(field_node)
+            if not len(fields_node):
+                node.remove(fields_node)
 
         return node
 
+    def to_xml(self, value, fields=None):
+        """Stamp entity XML string.
+
+        :param value: `str` entity value.
+        :param fields (optional): field values, see `to_node`.
+        :returns: `str` XML.
+        """
+        return etree.tostring(self.to_node(value, fields))
+
+
+def to_list(column):
+    """Convert column to list.
+
+    :param column: sequence, `numpy.ndarray` or Arrow-like array.
+    :returns: `list` of values.
+    """
+    if isinstance(column, list):
+        return column
+    if hasattr(column, 'tolist'):
+        return column.tolist()
+    if hasattr(column, 'to_pylist'):
+        return column.to_pylist()
+    return list(column)
+
+
+def from_columns(name, values, fields=None, weights=None, icon_urls=None,
+                 labels=None, wrap=True):
+    """Serialize batch of entities from columns without entity objects.
+
+    Result is equal to serialized `Entity` objects with the same values.
+
+    :param name: `str` entity name.
+    :param values: column of entity values.
+    :param fields (optional): `dict` or `list` of pairs, field name or
+        `entities.Field` instance with display name and matching rule
+        to column of field values, false values are skipped.
+    :param weights (optional): column of entity weights.
+    :param icon_urls (optional): column of entity icon urls.
+    :param labels (optional): `list` of `entities.Label` instances of
+        all entities or `entities.LabelTemplate` instances rendered with
+        `value` and field values of each entity.
+    :param wrap (optional): `bool` wrap entities in `Entities` node,
+        not wrapped XML may be passed to `TransformResponse` as entity.
+    :returns: `bytes` XML.
+    """
+    from pymaltego import serializers
+
+    def texts(column):
+        column = to_list(column)
+        if len(column) != len(values):
+            raise ValueError(
+                'Column has {} rows, expected {}.'.format(
+                    len(column), len(values)
+                )
+            )
+        return [
+            serializers.escape_text(text(value)) if value else None
+            for value in column
+        ]
+
+    values = to_list(values)
+    escape = serializers.escape_attribute
+
+    columns = []
+    context = [('value', values)]
+    fields = fields.items() if isinstance(fields, dict) else fields or ()
+    for field, column in fields:
+        if not isinstance(field, Field):
+            field = Field(field, None)
+        column = to_list(column)
+        context.append((field.name, column))
+        tag = '<Field Name="{}" DisplayName="{}"'.format(
+            escape(field.name), escape(field.display_name)
+        )
+        if field.matching_rule is not None:
+            tag += ' MatchingRule="{}"'.format(escape(field.matching_rule))
+        columns.append((tag + '>', texts(column)))
+
+    if weights is not None:
+        weights = [
+            None if weight is None else
+            '<Weight>{}</Weight>'.format(escaped) if escaped else '<Weight/>'
+            for weight, escaped in zip(to_list(weights), texts(weights))
+        ]
+    if icon_urls is not None:
+        icon_urls = texts(icon_urls)
+    if labels:
+        labels = [
+            label if isinstance(label, LabelTemplate)
+            else serializers.object_xml(label)
+            for label in labels
+        ]
+        if any(isinstance(label, LabelTemplate) for label in labels):
+            names = [name for name, _ in context]
+            labels = [
+                '<DisplayInformation>{}</DisplayInformation>'.format(''.join(
+                    label.xml(row) if isinstance(label, LabelTemplate)
+                    else label for label in labels
+                ))
+                for row in (
+                    dict(zip(names, row))
+                    for row in zip(*[column for _, column in context])
+                )
+            ]
+        else:
+            labels = [
+                '<DisplayInformation>{}</DisplayInformation>'.format(
+                    ''.join(labels)
+                )
+            ] * len(values)
+
+    head = '<Entity Type="{}">'.format(escape(name))
+    parts = ['<Entities>'] if wrap and values else []
+    append = parts.append
+
+    for index, value in enumerate(texts(values)):
+        append(head)
+        if value is None:
+            append('<Value/>')
+        else:
+            append('<Value>{}</Value>'.format(value))
+
+        if weights is not None and weights[index] is not None:
+            append(weights[index])
+
+        if columns:
+            row = [
+                '{}{}</Field>'.format(tag, column[index])
+                for tag, column in columns if column[index] is not None
+            ]
+            if row:
+                append('<AdditionalFields>')
+                parts.extend(row)
+                append('</AdditionalFields>')
+
+        if labels:
+            append(labels[index])
+
+        if icon_urls is not None and icon_urls[index] is not None:
+            append('<IconURL>{}</IconURL>'.format(icon_urls[index]))
+
+        append('</Entity>')
+
+    if wrap:
+        append('</Entities>' if values else '<Entities/>')
+    return ''.join(parts).encode('ascii', 'xmlcharrefreplace')
+
+
+class Fragment(object):
+
+    """Serialized entity nodes spliced into responses verbatim."""
+
+    def __init__(self, xml, count=None):
+        """Override initialization instance.
+
+        :param xml: `bytes` UTF-8 XML of one or more `Entity` nodes.
+        :param count (optional): `int` count of entities, fragment is
+            parsed to count them on first use by default.
+        """
+        self.xml = xml
+        self._count = count
+
+    @property
+    def count(self):
+        """Count of entities.
+
+        :returns: `int` count.
+        :raises: `exceptions.MalformedEntityError` if counted in invalid
+            XML.
+        """
+        if self._count is None:
+            self._count = len([
+                node for node in self.to_nodes()
+                if isinstance(node.tag, str)
+            ])
+        return self._count
+
+    @count.setter
+    def count(self, value):
+        self._count = value
+
+    def to_nodes(self, validate=False):
+        """Parse entity nodes.
+
+        :param validate (optional): `bool` or `validation.Validator`
+            instance, check structure of entities.
+        :returns: `list` of `etree.Element` instances.
+        """
+        try:
+            node = etree.fromstring(
+                b'<Entities>' + self.xml + b'</Entities>'
+            )
+        except etree.XMLSyntaxError as e:
+            raise exceptions.MalformedEntityError(
+                'Invalid XML fragment: {}'.format(e)
+            )
+
+        if validate:
+            if validate is True:
+                from pymaltego import validation
+
+                validate = validation.fragment_validator
+            validate.validate(node)
+
+        return list(node)
+
 
 class UIMessage(XMLObject):
 
@@ -276,7 +846,7 @@ class UIMessage(XMLObject):
         super(UIMessage, cls).from_node(node)
 
         return cls(
-            node.text.strip(), node.attrib['MessageType']
+            (node.text or '').strip(), node.attrib['MessageType']
         )
 
     def to_node(self):
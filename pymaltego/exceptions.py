@@ -14,3 +14,38 @@ class MalformedEntityError(PyMaltegoException):
 
 class MalformedMessageError(PyMaltegoException):
     pass
+
+
+class ValidationError(MalformedMessageError):
+
+    """Message failed structural validation."""
+
+    def __init__(self, errors):
+        """Override initialization instance.
+
+        :param errors: `list` of `str` errors.
+        """
+        super(ValidationError, self).__init__(' '.join(errors))
+        self.errors = errors
+
+
+class RateLimitError(PyMaltegoException):
+    pass
+
+
+class SizeLimitError(PyMaltegoException):
+    pass
+
+
+class TransformError(PyMaltegoException):
+
+    """Error of transform reported to Maltego client."""
+
+    def __init__(self, message, code=None):
+        """Override initialization instance.
+
+        :param message: `str` error message.
+        :param code (optional): `int` error code.
+        """
+        super(TransformError, self).__init__(message)
+        self.code = code
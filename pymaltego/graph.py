@@ -0,0 +1,329 @@
+# coding=utf-8
+
+"""Graph of transform results for bulk export.
+
+Nodes are entities keyed by type and value, edges are kept as indexes
+into node and link properties tables in arrays, a few bytes per edge.
+"""
+
+import array
+import threading
+
+from . import entities, serializers
+
+LINK_FIELD_PREFIX = 'link#'
+LINK_LABEL = 'maltego.link.label'
+LINK_TYPE = 'maltego.link.transform-link'
+GRAPHML_NAMESPACE = 'http://graphml.graphdrawing.org/xmlns'
+MTGX_NAMESPACE = 'http://maltego.paterva.com/xml/mtgx'
+CHUNK_SIZE = 4096
+
+
+def link_fields(properties):
+    """Create Maltego link fields of entity.
+
+    :param properties: `dict` link property name to value.
+    :returns: `list` of `entities.Field` instances.
+    """
+    return [
+        entities.Field(LINK_FIELD_PREFIX + name, value, display_name=name)
+        for name, value in properties.items()
+    ]
+
+
+def _text(value):
+    """Escape node text of any value."""
+    return serializers.escape_text(entities.text(value))
+
+
+def _attribute(value):
+    """Escape attribute value of any value."""
+    return serializers.escape_attribute(entities.text(value))
+
+
+def _fields(entity):
+    """Get fields of entity without link fields."""
+    return [
+        field for field in entity.fields
+        if field.value and not field.name.startswith(LINK_FIELD_PREFIX)
+    ]
+
+
+class GraphAccumulator(object):
+
+    """Entity graph with array-backed edge store, safe to share by threads.
+
+    Entities with the same type and value are one node, the first added
+    entity is kept. Edges are not deduplicated.
+    """
+
+    def __init__(self):
+        """Override initialization instance."""
+        self.nodes = []
+        self.links = [()]
+        self.sources = array.array('I')
+        self.targets = array.array('I')
+        self.properties = array.array('I')
+        self._nodes = {}
+        self._links = {(): 0}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.sources)
+
+    def _node(self, entity):
+        """Get index of entity node, add node if missing."""
+        key = (entity.name, entity.value)
+        index = self._nodes.get(key)
+        if index is None:
+            index = self._nodes[key] = len(self.nodes)
+            self.nodes.append(entity)
+        return index
+
+    def add_node(self, entity):
+        """Add entity node.
+
+        :param entity: `entities.Entity` instance.
+        :returns: `int` index of node.
+        """
+        with self._lock:
+            return self._node(entity)
+
+    def _link(self, properties):
+        """Get index of link properties, add properties if missing.
+
+        Values are converted to text, so unhashable values can be used.
+        """
+        key = ()
+        if properties:
+            key = tuple(sorted(
+                (name, entities.text(value))
+                for name, value in properties.items()
+            ))
+        link = self._links.get(key)
+        if link is None:
+            link = self._links[key] = len(self.links)
+            self.links.append(key)
+        return link
+
+    def add_edge(self, source, target, properties=None):
+        """Add edge between entities, missing nodes are added.
+
+        :param source: `entities.Entity` instance.
+        :param target: `entities.Entity` instance.
+        :param properties (optional): `dict` link property name to value.
+        """
+        with self._lock:
+            self.sources.append(self._node(source))
+            self.targets.append(self._node(target))
+            self.properties.append(self._link(properties))
+
+    def add_edges(self, source, targets, properties=None):
+        """Add edges from entity with the same link properties at once.
+
+        :param source: `entities.Entity` instance.
+        :param targets: iterable of `entities.Entity` instances.
+        :param properties (optional): `dict` link property name to value.
+        """
+        with self._lock:
+            source = self._node(source)
+            indexes = array.array('I', [self._node(item) for item in targets])
+            self.targets.extend(indexes)
+            self.sources.extend(array.array('I', [source]) * len(indexes))
+            self.properties.extend(
+                array.array('I', [self._link(properties)]) * len(indexes)
+            )
+
+    def _iter_chunks(self, count):
+        """Iterate copies of edge arrays in chunks.
+
+        :param count: `int` edges to iterate.
+        :returns: iterator of `zip` of source, target and link indexes.
+        """
+        for start in range(0, count, CHUNK_SIZE):
+            stop = min(start + CHUNK_SIZE, count)
+            with self._lock:
+                chunk = (
+                    self.sources[start:stop], self.targets[start:stop],
+                    self.properties[start:stop]
+                )
+            yield zip(*chunk)
+
+    def edges(self):
+        """Iterate edges.
+
+        :returns: iterator of `(source, target, properties)` tuples of
+            `entities.Entity` instances and `dict` link properties.
+        """
+        for chunk in self._iter_chunks(len(self)):
+            for source, target, link in chunk:
+                yield (
+                    self.nodes[source], self.nodes[target],
+                    dict(self.links[link])
+                )
+
+    def _snapshot(self):
+        """Copy node and link tables with count of edges using them.
+
+        :returns: `tuple` of `list` nodes, `list` links and `int` count.
+        """
+        with self._lock:
+            return self.nodes[:], self.links[:], len(self.sources)
+
+    def _iter_xml(self, snapshot, header, node_xml, edge_xml, footer):
+        """Serialize nodes and edges of snapshot in chunks.
+
+        :returns: iterator of `bytes` chunks.
+        """
+        nodes, links, count = snapshot
+
+        yield header.encode('ascii', 'xmlcharrefreplace')
+
+        for start in range(0, len(nodes), CHUNK_SIZE):
+            yield ''.join(
+                node_xml(index, nodes[index])
+                for index in range(start, min(start + CHUNK_SIZE, len(nodes)))
+            ).encode('ascii', 'xmlcharrefreplace')
+
+        index = 0
+        for chunk in self._iter_chunks(count):
+            parts = []
+            for source, target, link in chunk:
+                parts.append(edge_xml(index, source, target, links[link]))
+                index += 1
+            yield ''.join(parts).encode('ascii', 'xmlcharrefreplace')
+
+        yield footer.encode('ascii')
+
+    def iter_graphml(self):
+        """Serialize to GraphML chunks.
+
+        Nodes have `type`, `value` and field values as data, edges have
+        link properties as data.
+
+        :returns: iterator of `bytes` chunks.
+        """
+        snapshot = self._snapshot()
+        nodes, links, _ = snapshot
+
+        field_keys = {}
+        for entity in nodes:
+            for field in _fields(entity):
+                field_keys.setdefault(
+                    field.name, 'f{}'.format(len(field_keys))
+                )
+
+        link_keys = {}
+        for properties in links:
+            for name, _ in properties:
+                link_keys.setdefault(name, 'l{}'.format(len(link_keys)))
+
+        header = [
+            '<?xml version="1.0" encoding="UTF-8"?>',
+            '<graphml xmlns="{}">'.format(GRAPHML_NAMESPACE),
+            '<key id="type" for="node" attr.name="type" attr.type="string"/>',
+            '<key id="value" for="node" attr.name="value"'
+            ' attr.type="string"/>',
+        ]
+        for kind, keys in (('node', field_keys), ('edge', link_keys)):
+            for name, key in keys.items():
+                header.append(
+                    '<key id="{}" for="{}" attr.name="{}"'
+                    ' attr.type="string"/>'.format(key, kind, _attribute(name))
+                )
+        header.append('<graph id="G" edgedefault="directed">')
+
+        def node_xml(index, entity):
+            parts = [
+                '<node id="n{}"><data key="type">{}</data>'
+                '<data key="value">{}</data>'.format(
+                    index, _text(entity.name), _text(entity.value)
+                )
+            ]
+            for field in _fields(entity):
+                parts.append('<data key="{}">{}</data>'.format(
+                    field_keys[field.name], _text(field.value)
+                ))
+            parts.append('</node>')
+            return ''.join(parts)
+
+        def edge_xml(index, source, target, properties):
+            parts = ['<edge id="e{}" source="n{}" target="n{}">'.format(
+                index, source, target
+            )]
+            for name, value in properties:
+                parts.append('<data key="{}">{}</data>'.format(
+                    link_keys[name], _text(value)
+                ))
+            parts.append('</edge>')
+            return ''.join(parts)
+
+        return self._iter_xml(
+            snapshot, ''.join(header), node_xml, edge_xml, '</graph></graphml>'
+        )
+
+    def iter_maltego(self):
+        """Serialize to Maltego graph XML chunks.
+
+        GraphML with `mtg:MaltegoEntity` node data and `mtg:MaltegoLink`
+        edge data, link properties are properties of links.
+
+        :returns: iterator of `bytes` chunks.
+        """
+        header = (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<graphml xmlns="{}" xmlns:mtg="{}">'
+            '<key id="d0" for="node" attr.name="MaltegoEntity"/>'
+            '<key id="d1" for="edge" attr.name="MaltegoLink"/>'
+            '<graph id="G" edgedefault="directed">'
+        ).format(GRAPHML_NAMESPACE, MTGX_NAMESPACE)
+
+        def properties_xml(properties):
+            return ''.join(
+                '<mtg:Property name="{0}" displayName="{1}" type="string">'
+                '<mtg:Value>{2}</mtg:Value></mtg:Property>'.format(
+                    _attribute(name), _attribute(display_name), _text(value)
+                )
+                for name, display_name, value in properties
+            )
+
+        def node_xml(index, entity):
+            properties = [('value', 'Value', entity.value)]
+            properties.extend(
+                (field.name, field.display_name, field.value)
+                for field in _fields(entity)
+            )
+            return (
+                '<node id="n{}"><data key="d0">'
+                '<mtg:MaltegoEntity type="{}"><mtg:Properties>{}'
+                '</mtg:Properties></mtg:MaltegoEntity></data></node>'
+            ).format(
+                index, _attribute(entity.name), properties_xml(properties)
+            )
+
+        def edge_xml(index, source, target, properties):
+            return (
+                '<edge id="e{}" source="n{}" target="n{}"><data key="d1">'
+                '<mtg:MaltegoLink type="{}"><mtg:Properties>{}'
+                '</mtg:Properties></mtg:MaltegoLink></data></edge>'
+            ).format(
+                index, source, target, LINK_TYPE, properties_xml(
+                    (name, name, value) for name, value in properties
+                )
+            )
+
+        return self._iter_xml(
+            self._snapshot(), header, node_xml, edge_xml, '</graph></graphml>'
+        )
+
+    def write(self, stream, maltego=False):
+        """Stream graph to file.
+
+        :param stream: binary file-like object.
+        :param maltego (optional): `bool` write Maltego graph XML
+            instead of GraphML.
+        """
+        chunks = self.iter_maltego() if maltego else self.iter_graphml()
+        for chunk in chunks:
+            stream.write(chunk)
+        stream.flush()
@@ -0,0 +1,172 @@
+# coding=utf-8
+
+import io
+
+from . import exceptions
+from .lazy import LazyModule
+
+etree = LazyModule('lxml.etree')
+
+CHUNK_SIZE = 64 * 1024
+
+
+class SizeLimits(object):
+
+    """Payload size limits, `None` disables limit."""
+
+    def __init__(self, max_bytes=None, max_entities=None, max_fields=None,
+                 max_label_bytes=None, max_depth=None):
+        """Override initialization instance.
+
+        :param max_bytes (optional): `int` max payload size.
+        :param max_entities (optional): `int` max count of entities.
+        :param max_fields (optional): `int` max count of fields per entity.
+        :param max_label_bytes (optional): `int` max UTF-8 size of label.
+        :param max_depth (optional): `int` max nesting depth of XML.
+        """
+        self.max_bytes = max_bytes
+        self.max_entities = max_entities
+        self.max_fields = max_fields
+        self.max_label_bytes = max_label_bytes
+        self.max_depth = max_depth
+
+    @staticmethod
+    def _check(name, value, limit):
+        """Raise if value exceeds limit."""
+        if limit is not None and value > limit:
+            raise exceptions.SizeLimitError(
+                'Too large {}: {} > {}.'.format(name, value, limit)
+            )
+
+    def check_bytes(self, size):
+        """Check payload size.
+
+        :param size: `int` payload size in bytes.
+        """
+        self._check('payload', size, self.max_bytes)
+
+    def check_entities(self, count):
+        """Check count of entities.
+
+        :param count: `int` entities count.
+        """
+        self._check('entities count', count, self.max_entities)
+
+    def check_fields(self, count):
+        """Check count of fields of one entity.
+
+        :param count: `int` fields count.
+        """
+        self._check('fields count', count, self.max_fields)
+
+    def check_label(self, value):
+        """Check size of label value.
+
+        :param value: `str` label value.
+        """
+        if self.max_label_bytes is not None:
+            self._check(
+                'label', len((value or '').encode('utf-8')),
+                self.max_label_bytes
+            )
+
+    def check_depth(self, depth):
+        """Check nesting depth.
+
+        :param depth: `int` depth of node.
+        """
+        self._check('nesting depth', depth, self.max_depth)
+
+    def check_entity(self, entity):
+        """Check entity before serialization.
+
+        :param entity: `entities.Entity` instance or `etree.Element` node.
+        """
+        if etree.iselement(entity):
+            self.check_fields(len(entity.findall('AdditionalFields/Field')))
+            for label in entity.iterfind('DisplayInformation/Label'):
+                self.check_label(label.text)
+            return
+
+        self.check_fields(len(entity.fields))
+        for label in entity.labels:
+            self.check_label(label.value)
+
+
+class LimitedParser(object):
+
+    """Incremental parser checking limits on each fed chunk."""
+
+    def __init__(self, limits):
+        """Override initialization instance.
+
+        :param limits: `guards.SizeLimits` instance.
+        """
+        self.limits = limits
+        self.size = 0
+        self._parser = etree.XMLPullParser(events=('start', 'end'))
+        self._path = []
+        self._entities = 0
+        self._fields = 0
+
+    def feed(self, chunk):
+        """Parse chunk of XML.
+
+        :param chunk: `bytes` part of XML.
+        :raises: `exceptions.SizeLimitError` at first exceeded limit.
+        """
+        limits = self.limits
+        path = self._path
+
+        self.size += len(chunk)
+        limits.check_bytes(self.size)
+        self._parser.feed(chunk)
+
+        for event, node in self._parser.read_events():
+            if event == 'end':
+                path.pop()
+                if node.tag == 'Label':
+                    limits.check_label(node.text)
+                continue
+
+            path.append(node.tag)
+            limits.check_depth(len(path))
+
+            if node.tag == 'Entity':
+                self._entities += 1
+                self._fields = 0
+                limits.check_entities(self._entities)
+            elif node.tag == 'Field' and path[-2:-1] == ['AdditionalFields']:
+                self._fields += 1
+                limits.check_fields(self._fields)
+
+    def close(self):
+        """Finish parsing.
+
+        :returns: `etree.Element` root node.
+        """
+        return self._parser.close()
+
+
+def parse(source, limits):
+    """Parse XML checking limits while reading.
+
+    :param source: `str`, `bytes` XML or file-like object.
+    :param limits: `guards.SizeLimits` instance.
+    :returns: `etree.Element` root node.
+    :raises: `exceptions.SizeLimitError` at first exceeded limit.
+    """
+    if not hasattr(source, 'read'):
+        if not isinstance(source, bytes):
+            source = source.encode('utf-8')
+        limits.check_bytes(len(source))
+        source = io.BytesIO(source)
+
+    parser = LimitedParser(limits)
+    while True:
+        chunk = source.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        parser.feed(chunk)
+
+    return parser.close()
@@ -0,0 +1,24 @@
+# coding=utf-8
+
+import importlib
+
+
+class LazyModule(object):
+
+    """Module imported on first attribute access."""
+
+    def __init__(self, name):
+        """Override initialization instance.
+
+        :param name: `str` full module name.
+        """
+        self.__name = name
+
+    def __getattr__(self, attr):
+        """Import module and copy its namespace.
+
+        Later lookups are plain instance attributes without overhead.
+        """
+        module = importlib.import_module(self.__name)
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
@@ -0,0 +1,164 @@
+# coding=utf-8
+
+"""Maltego local transforms protocol.
+
+Local transforms get entity value and fields as command line arguments
+`value key=val#key2=val2` and write response XML to stdout.
+"""
+
+import json
+import os
+import socket
+
+from . import constants, entities, messages, serializers
+
+BUFFER_SIZE = 64 * 1024
+
+
+def parse_fields(text):
+    """Parse fields argument, `#` and `=` may be escaped with backslash.
+
+    :param text: `str` fields as `key=val#key2=val2`.
+    :returns: `list` of `entities.Field` instances.
+    """
+    items = [([], [])]
+    current = items[-1][0]
+    chars = iter(text)
+
+    for char in chars:
+        if char == '\\':
+            current.append(next(chars, '\\'))
+        elif char == '=' and current is items[-1][0]:
+            current = items[-1][1]
+        elif char == '#':
+            items.append(([], []))
+            current = items[-1][0]
+        else:
+            current.append(char)
+
+    return [
+        entities.Field(''.join(name), ''.join(value))
+        for name, value in items if name
+    ]
+
+
+def from_args(args, entity_type=constants.DEFAULT_LOCAL_ENTITY_TYPE):
+    """Create request from local transform arguments.
+
+    :param args: `list` of `str` arguments as `[value, fields]`.
+    :param entity_type (optional): `str` type of input entity.
+    :returns: `messages.TransformRequest` instance.
+    """
+    if not args or len(args) > 2:
+        raise ValueError('Local transform takes value and optional fields.')
+
+    fields = parse_fields(args[1]) if len(args) == 2 else []
+
+    message = messages.TransformRequest()
+    message.entities.append(
+        entities.Entity(entity_type, args[0], fields=fields)
+    )
+    return message
+
+
+def run(transform, args, stream):
+    """Run transform with local transform arguments.
+
+    Response is serialized before writing, so only complete response or
+    exception message is written.
+
+    :param transform: `transforms.BaseTransform` subclass.
+    :param args: `list` of `str` arguments as `[value, fields]`.
+    :param stream: binary file-like object for response.
+    """
+    try:
+        xml = serializers.to_xml(transform(from_args(args)).to_response())
+    except transform.handled_exceptions as e:
+        xml = transform.exception_response(e).to_xml()
+    stream.write(xml)
+    stream.flush()
+
+
+def make_server(path, load_transform):
+    """Create warm process server on UNIX socket.
+
+    Launcher sends JSON list `[transform path, value, fields]` with
+    new line and reads response XML until connection is closed. Errors
+    of loading transform or bad arguments are sent as exception message.
+
+    :param path: `str` socket path, stale socket file is replaced.
+    :param load_transform: callable loading transform by path.
+    :returns: `socketserver.ThreadingUnixStreamServer` instance.
+    """
+    import socketserver
+
+    transforms = {}
+
+    class Handler(socketserver.StreamRequestHandler):
+
+        def handle(self):
+            try:
+                request = json.loads(self.rfile.readline().decode('utf-8'))
+                name, args = request[0], request[1:]
+                if name not in transforms:
+                    transforms[name] = load_transform(name)
+                run(transforms[name], args, self.wfile)
+            except Exception as e:
+                self.wfile.write(
+                    messages.TransformException.from_exception(e).to_xml()
+                )
+
+    if os.path.exists(path):
+        os.remove(path)
+
+    server = socketserver.ThreadingUnixStreamServer(path, Handler)
+    server.daemon_threads = True
+    return server
+
+
+def serve(path, load_transform):
+    """Serve local transforms from warm process until interrupted.
+
+    :param path: `str` socket path.
+    :param load_transform: callable loading transform by path.
+    """
+    server = make_server(path, load_transform)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.remove(path)
+
+
+def forward(path, name, args, stream):
+    """Forward local transform call to warm process.
+
+    :param path: `str` socket path of `local.serve` process.
+    :param name: `str` transform path as `module:Class`.
+    :param args: `list` of `str` arguments as `[value, fields]`.
+    :param stream: binary file-like object for response.
+    :returns: `bool` `False` if warm process is not running or closed
+        connection without response.
+    """
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        try:
+            connection.connect(path)
+        except (FileNotFoundError, ConnectionRefusedError):
+            return False
+
+        connection.sendall(json.dumps([name] + list(args)).encode() + b'\n')
+        connection.shutdown(socket.SHUT_WR)
+        received = False
+        while True:
+            chunk = connection.recv(BUFFER_SIZE)
+            if not chunk:
+                break
+            stream.write(chunk)
+            received = True
+        stream.flush()
+        return received
+    finally:
+        connection.close()
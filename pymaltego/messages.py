@@ -1,9 +1,16 @@
 # coding=utf-8
 
-from lxml import etree
+import copy
+import functools
+import types
 
-from pymaltego import exceptions, constants
-from pymaltego.entities import XMLObject, Node, Entity, UIMessage
+from pymaltego import cache, exceptions, constants, guards
+from pymaltego.entities import (
+    XMLObject, Node, Entity, Fragment, Frozen, UIMessage, frozen
+)
+from pymaltego.lazy import LazyModule
+
+etree = LazyModule('lxml.etree')
 
 
 class MaltegoMessage(XMLObject):
@@ -63,27 +70,130 @@ class MaltegoMessage(XMLObject):
         message.append(self.to_node())
         return etree.tostring(message, pretty_print=pretty_print)
 
+    async def to_xml_async(self, executor=None,
+                           threshold=constants.ASYNC_SERIALIZE_THRESHOLD):
+        """Serialize to XML string without blocking event loop.
+
+        Messages with less entities than threshold are serialized inline,
+        others and entities iterables without length, e.g. generators,
+        in executor.
+
+        :param executor (optional): `concurrent.futures.Executor` instance,
+            default executor of loop by default.
+        :param threshold (optional): `int` min count of entities
+            serialized in executor.
+        :returns: `str` XML, equal to `to_xml()`.
+        """
+        import asyncio
+
+        from pymaltego import serializers
+
+        items = getattr(self, 'entities', ())
+        if hasattr(items, '__len__') and len(items) < threshold:
+            return serializers.to_xml(self)
+        return await asyncio.get_running_loop().run_in_executor(
+            executor, serializers.to_xml, self
+        )
+
 
 class TransformRequest(MaltegoMessage):
 
     """Maltego transform request message object."""
 
     @classmethod
-    def from_xml(cls, xml):
+    def from_xml(cls, xml, validate=False, limits=None):
         """Create object from xml.
 
-        :param xml: `str` XML.
+        :param xml: `str` XML or file-like object if limits passed.
+        :param validate (optional): `bool` or `validation.Validator`
+            instance, check structure before loading.
+        :param limits (optional): `guards.SizeLimits` instance, checked
+            while parsing.
         :returns: `messages.TransformRequest` instance.
         """
-        return cls.from_node(etree.fromstring(xml))
+        try:
+            if limits is not None:
+                node = guards.parse(xml, limits)
+            else:
+                node = etree.fromstring(xml)
+        except etree.XMLSyntaxError as e:
+            raise exceptions.MalformedMessageError(
+                'Invalid XML: {}'.format(e)
+            )
+        return cls.from_node(node, validate)
 
     @classmethod
-    def from_node(cls, node):
+    async def from_xml_async(cls, source, validate=False, limits=None,
+                             executor=None,
+                             threshold=constants.ASYNC_PARSE_THRESHOLD):
+        """Create object from XML without blocking event loop.
+
+        Payloads smaller than threshold are parsed inline, others in
+        executor. Async iterable of chunks, e.g. request body stream, is
+        fed to incremental parser as chunks arrive.
+
+        :param source: `str`, `bytes` XML or async iterable of `bytes`.
+        :param validate (optional): `bool` or `validation.Validator`
+            instance, check structure before loading.
+        :param limits (optional): `guards.SizeLimits` instance, checked
+            while parsing.
+        :param executor (optional): `concurrent.futures.Executor` instance,
+            default executor of loop by default.
+        :param threshold (optional): `int` min payload size in bytes
+            parsed in executor.
+        :returns: `messages.TransformRequest` instance.
+        """
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+
+        if not hasattr(source, '__aiter__'):
+            if len(source) < threshold:
+                return cls.from_xml(source, validate, limits)
+            return await loop.run_in_executor(
+                executor, functools.partial(
+                    cls.from_xml, source, validate, limits
+                )
+            )
+
+        parser = etree.XMLParser() if limits is None else (
+            guards.LimitedParser(limits)
+        )
+        size = 0
+        try:
+            async for chunk in source:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode('utf-8')
+                size += len(chunk)
+                parser.feed(chunk)
+            node = parser.close()
+        except etree.XMLSyntaxError as e:
+            raise exceptions.MalformedMessageError(
+                'Invalid XML: {}'.format(e)
+            )
+
+        if size < threshold:
+            return cls.from_node(node, validate)
+        return await loop.run_in_executor(
+            executor, functools.partial(cls.from_node, node, validate)
+        )
+
+    @classmethod
+    def from_node(cls, node, validate=False):
         """Load values from node.
 
         :param node: `etree.Element` instance.
+        :param validate (optional): `bool` or `validation.Validator`
+            instance, check structure before loading.
         :returns: `messages.TransformRequest` instance.
         """
+        if validate:
+            if validate is True:
+                from pymaltego import validation
+
+                validate = validation.request_validator
+            validate.validate(node)
+
         node = super(TransformRequest, cls).from_node(node)
 
         entity_nodes = node.find('Entities')
@@ -114,25 +224,103 @@ class TransformRequest(MaltegoMessage):
                 limit.attrib.get('SoftLimit', constants.DEFAULT_SOFT_LIMIT)
             )
             instance.hard_limit = int(
-                limit.attrib.get('HardLimit', constants.DEFAULT_SOFT_LIMIT)
+                limit.attrib.get('HardLimit', constants.DEFAULT_HARD_LIMIT)
             )
 
         return instance
 
+    def to_node(self):
+        """Serialize to `etree.Element` instance.
+
+        :returns: `etree.Element` instance.
+        """
+        node = super(TransformRequest, self).to_node()
+
+        entities_node = Node('Entities', parent=node)
+        for entity in self.entities:
+            entity.to_node(entities_node)
+
+        if self.fields:
+            fields_node = Node('TransformFields', parent=node)
+            for name, value in self.fields.items():
+                Node('Field', value, parent=fields_node, Name=name)
+
+        Node(
+            'Limits', parent=node, SoftLimit=str(self.soft_limit),
+            HardLimit=str(self.hard_limit)
+        )
+
+        return node
+
+    def freeze(self):
+        """Create read-only hashable copy, shared without copying.
+
+        :returns: `messages.FrozenTransformRequest` instance.
+        """
+        return frozen(
+            FrozenTransformRequest, self,
+            entities=tuple(entity.freeze() for entity in self.entities),
+            fields=types.MappingProxyType(dict(self.fields)),
+            ui_messages=tuple(self.ui_messages)
+        )
+
+
+class FrozenTransformRequest(Frozen, TransformRequest):
+
+    """Read-only request shared between threads and transforms.
+
+    Created by `TransformRequest.freeze()`, entities are
+    `entities.FrozenEntity` instances and fields are read-only mapping.
+    """
+
+    def _key(self):
+        """Get values identifying request.
+
+        :returns: `tuple` of hashable values.
+        """
+        return (
+            self.entities, tuple(sorted(self.fields.items())),
+            self.soft_limit, self.hard_limit, self.ui_messages
+        )
+
+    def thaw(self, **changes):
+        """Create mutable copy.
+
+        :param changes: `dict` attributes of copy to replace.
+        :returns: `messages.TransformRequest` instance.
+        """
+        changes.setdefault(
+            'entities', [entity.thaw() for entity in self.entities]
+        )
+        changes.setdefault('fields', dict(self.fields))
+        changes.setdefault('ui_messages', list(self.ui_messages))
+        return super(FrozenTransformRequest, self).thaw(**changes)
+
 
 class TransformResponse(MaltegoMessage):
 
     """Maltego transform response message."""
 
-    def __init__(self, entities, ui_messages=None):
+    def __init__(self, entities, ui_messages=None, limits=None,
+                 validate=False):
         """Override initialization instance.
 
-        :param entities: `list` `entities.Entity` instances.
+        :param entities: `list` `entities.Entity` instances,
+            `etree.Element` entity nodes, e.g. from `entities.EntityTemplate`,
+            copied, so nodes stay in their trees,
+            `entities.Fragment` instances or `bytes` of serialized
+            entities, e.g. from cache, spliced verbatim.
         :param ui_messages: `list` UI messages.
+        :param limits (optional): `guards.SizeLimits` instance, checked
+            while serializing.
+        :param validate (optional): `bool` or `validation.Validator`
+            instance, check structure of serialized entities.
         """
         super(TransformResponse, self).__init__()
         self.entities = entities
         self.ui_messages = ui_messages or []
+        self.limits = limits
+        self.validate = validate
 
     @classmethod
     def from_node(cls, node):
@@ -155,8 +343,9 @@ class TransformResponse(MaltegoMessage):
 
         ui_messages = []
         message_nodes = node.find('UIMessages')
-        for message in message_nodes.getchildren():
-            ui_messages.append(UIMessage.from_node(message))
+        if message_nodes is not None:
+            for message in message_nodes.getchildren():
+                ui_messages.append(UIMessage.from_node(message))
 
         return cls(entities, ui_messages)
 
@@ -168,7 +357,165 @@ class TransformResponse(MaltegoMessage):
         node = super(TransformResponse, self).to_node()
 
         entities_node = Node('Entities', parent=node)
+        for entity in self._iter_entities():
+            if isinstance(entity, Entity):
+                entity.to_node(entities_node)
+            elif etree.iselement(entity):
+                entities_node.append(copy.deepcopy(entity))
+            elif isinstance(entity, Fragment):
+                entities_node.extend(entity.to_nodes())
+            elif isinstance(entity, bytes):
+                entities_node.extend(Fragment(entity).to_nodes())
+            else:
+                entities_node.append(entity.to_node())
+
+        return node
+
+    def _iter_entities(self):
+        """Iterate entities checking limits and serialized entities.
+
+        :returns: iterator of `entities.Entity` instances.
+        """
+        if self.limits is None and not self.validate:
+            return iter(self.entities)
+        return self._iter_checked_entities()
+
+    def _iter_checked_entities(self):
+        """Iterate entities checking them before serialization.
+
+        Serialized entities are parsed only if `validate` is set,
+        otherwise only their count is checked.
+        """
+        count = 0
         for entity in self.entities:
-            entities_node.append(entity.to_node())
+            if isinstance(entity, bytes):
+                entity = Fragment(entity)
+
+            if not isinstance(entity, Fragment):
+                count += 1
+                if self.limits is not None:
+                    self.limits.check_entities(count)
+                    self.limits.check_entity(entity)
+                yield entity
+                continue
+
+            if self.validate:
+                nodes = entity.to_nodes(self.validate)
+                entity.count = len(nodes)
+                if self.limits is not None:
+                    for node in nodes:
+                        self.limits.check_entity(node)
+
+            count += entity.count
+            if self.limits is not None:
+                self.limits.check_entities(count)
+            yield entity
+
+    def iter_xml(self):
+        """Serialize to XML chunks, one entity at a time.
+
+        Output is equal to `to_xml()`, but whole tree is never built
+        and payload limit is checked while writing.
+
+        :returns: iterator of `bytes` chunks.
+        """
+        from pymaltego import serializers
+
+        size = 0
+        for part in serializers.iter_message(self):
+            chunk = part.encode('ascii', 'xmlcharrefreplace')
+            size += len(chunk)
+            if self.limits is not None:
+                self.limits.check_bytes(size)
+            yield chunk
+
+
+class TransformException(MaltegoMessage):
+
+    """Maltego transform exception message."""
+
+    xml_cache = cache.LRUCache(maxsize=256)
+
+    def __init__(self, errors, ui_messages=None):
+        """Override initialization instance.
+
+        :param errors: `list` of `str` messages or `(message, code)` pairs.
+        :param ui_messages: `list` UI messages.
+        """
+        super(TransformException, self).__init__()
+        self.errors = [
+            error if isinstance(error, tuple) else (error, None)
+            for error in errors
+        ]
+        self.ui_messages = ui_messages or []
+
+    @classmethod
+    def from_exception(cls, exception):
+        """Create message from exception.
+
+        :param exception: `Exception` instance.
+        :returns: `messages.TransformException` instance.
+        """
+        return cls(
+            [(str(exception), getattr(exception, 'code', None))]
+        )
+
+    @classmethod
+    def from_node(cls, node):
+        """Load values from node.
+
+        :param node: `etree.Element` instance.
+        :returns: `messages.TransformException` instance.
+        """
+        node = super(TransformException, cls).from_node(node)
+
+        errors = []
+        error_nodes = node.find('Exceptions')
+        if error_nodes is not None:
+            for error in error_nodes.getchildren():
+                errors.append(
+                    ((error.text or '').strip(), error.attrib.get('code'))
+                )
+
+        ui_messages = []
+        message_nodes = node.find('UIMessages')
+        if message_nodes is not None:
+            for message in message_nodes.getchildren():
+                ui_messages.append(UIMessage.from_node(message))
+
+        return cls(errors, ui_messages)
+
+    def to_node(self):
+        """Serialize to `etree.Element` instance.
+
+        :returns: `etree.Element` instance.
+        """
+        node = super(TransformException, self).to_node()
+
+        errors_node = Node('Exceptions', parent=node)
+        for message, code in self.errors:
+            error = Node('Exception', message, parent=errors_node)
+            if code is not None:
+                error.attrib['code'] = str(code)
 
         return node
+
+    def to_xml(self, pretty_print=False):
+        """Serialize to XML string, repeated messages are served from cache.
+
+        :param pretty_print (optional): `bool` human-readable XML.
+        :returns: `str` XML.
+        """
+        key = (
+            tuple(self.errors),
+            tuple(
+                (message.value, message.message_type)
+                for message in self.ui_messages
+            ),
+            pretty_print
+        )
+        xml = self.xml_cache.get(key)
+        if xml is None:
+            xml = super(TransformException, self).to_xml(pretty_print)
+            self.xml_cache.set(key, xml)
+        return xml
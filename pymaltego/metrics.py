@@ -0,0 +1,39 @@
+# coding=utf-8
+
+import threading
+
+_hooks = []
+_lock = threading.Lock()
+
+
+def register(hook):
+    """Register metrics hook.
+
+    :param hook: callable `hook(name, value, tags)`.
+    :returns: hook, so function can be used as decorator.
+    """
+    with _lock:
+        if hook not in _hooks:
+            _hooks.append(hook)
+    return hook
+
+
+def unregister(hook):
+    """Unregister metrics hook.
+
+    :param hook: previously registered callable.
+    """
+    with _lock:
+        if hook in _hooks:
+            _hooks.remove(hook)
+
+
+def emit(name, value, **tags):
+    """Send metric to all registered hooks.
+
+    :param name: `str` metric name.
+    :param value: `int` or `float` metric value.
+    :param tags (optional): metric tags.
+    """
+    for hook in tuple(_hooks):
+        hook(name, value, tags)
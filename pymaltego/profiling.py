@@ -0,0 +1,227 @@
+# coding=utf-8
+
+import cProfile
+import glob
+import itertools
+import os
+import sys
+import threading
+import time
+import traceback
+import tracemalloc
+
+_tracing_lock = threading.Lock()
+_tracing = {'calls': 0, 'started': False}
+
+
+def _start_tracing():
+    """Start tracing memory unless it is already traced."""
+    with _tracing_lock:
+        if not _tracing['calls'] and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracing['started'] = True
+        _tracing['calls'] += 1
+
+
+def _stop_tracing():
+    """Stop tracing memory started by last concurrent profiled call."""
+    with _tracing_lock:
+        _tracing['calls'] -= 1
+        if not _tracing['calls'] and _tracing['started']:
+            tracemalloc.stop()
+            _tracing['started'] = False
+
+
+class Profiler(object):
+
+    """Sampling cProfile and tracemalloc hook for slow transforms.
+
+    Every `sample_rate`-th call is profiled and saved if it took at least
+    `threshold` seconds. Other calls running longer than `threshold` are
+    not profiled, a watchdog thread saves their stack once the threshold
+    is reached.
+    """
+
+    def __init__(self, directory, sample_rate=100, threshold=None,
+                 memory=False, keep=100):
+        """Override initialization instance.
+
+        :param directory: `str` directory for profiles.
+        :param sample_rate (optional): `int` profile one call of N.
+        :param threshold (optional): `float` min seconds of saved calls.
+        :param memory (optional): `bool` also trace memory allocations.
+        :param keep (optional): `int` count of newest profiles to keep.
+        """
+        if sample_rate < 1:
+            raise ValueError('Sample rate should be at least 1.')
+
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.threshold = threshold
+        self.memory = memory
+        self.keep = keep
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._condition = threading.Condition()
+        self._tokens = itertools.count()
+        self._watched = {}
+        self._watchdog = None
+
+    def sampled(self):
+        """Check if next call should be profiled.
+
+        :returns: `bool`.
+        """
+        with self._lock:
+            return next(self._counter) % self.sample_rate == 0
+
+    def run(self, name, func, *args, **kwargs):
+        """Call function, profiling it if sampled.
+
+        Sampling is decided once per outermost call, nested calls in the
+        same thread, e.g. `to_response` inside `handle`, run as is.
+
+        :param name: `str` transform name.
+        :param func: callable.
+        :param count (optional): `int` entities count or callable
+            returning it after call.
+        :returns: result of `func`.
+        """
+        count = kwargs.pop('count', None)
+        if getattr(self._local, 'active', False):
+            return func(*args, **kwargs)
+
+        self._local.active = True
+        try:
+            if self.sampled():
+                return self._profile(name, func, args, kwargs, count)
+            if self.threshold is None:
+                return func(*args, **kwargs)
+
+            token = self._watch(name)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                with self._condition:
+                    self._watched.pop(token, None)
+        finally:
+            self._local.active = False
+
+    def _watch(self, name):
+        """Watch call in current thread, start watchdog if not running.
+
+        :param name: `str` transform name.
+        :returns: `int` token of watched call.
+        """
+        deadline = time.time() + self.threshold
+        with self._condition:
+            token = next(self._tokens)
+            self._watched[token] = (name, threading.get_ident(), deadline)
+            if self._watchdog is None or not self._watchdog.is_alive():
+                self._watchdog = threading.Thread(
+                    target=self._watch_loop, name='pymaltego-profiler'
+                )
+                self._watchdog.daemon = True
+                self._watchdog.start()
+            self._condition.notify()
+        return token
+
+    def _watch_loop(self):
+        """Save stacks of watched calls running past their deadline."""
+        while True:
+            with self._condition:
+                now = time.time()
+                due = [
+                    token for token, (_, _, deadline) in self._watched.items()
+                    if deadline <= now
+                ]
+                if not due:
+                    deadlines = [call[2] for call in self._watched.values()]
+                    self._condition.wait(
+                        min(deadlines) - now if deadlines else None
+                    )
+                    continue
+                calls = [self._watched.pop(token) for token in due]
+
+            frames = sys._current_frames()
+            for name, ident, _ in calls:
+                frame = frames.get(ident)
+                if frame is not None:
+                    self.save_stack(name, frame)
+
+    def _profile(self, name, func, args, kwargs, count):
+        """Call function under profiler and save profile."""
+        if self.memory:
+            _start_tracing()
+        profile = cProfile.Profile()
+        started = time.time()
+        try:
+            return profile.runcall(func, *args, **kwargs)
+        finally:
+            duration = time.time() - started
+            snapshot = None
+            if self.memory:
+                if tracemalloc.is_tracing():
+                    snapshot = tracemalloc.take_snapshot()
+                _stop_tracing()
+
+            if self.threshold is None or duration >= self.threshold:
+                if callable(count):
+                    count = count()
+                self.save(name, count, duration, profile, snapshot)
+
+    def save(self, name, count, duration, profile, snapshot=None):
+        """Save profile and rotate old ones.
+
+        :param name: `str` transform name.
+        :param count: `int` entities count or `None`.
+        :param duration: `float` seconds.
+        :param profile: `cProfile.Profile` instance.
+        :param snapshot (optional): `tracemalloc.Snapshot` instance.
+        :returns: `str` path of profile.
+        """
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+
+        tags = [name] if count is None else [name, '{}e'.format(count)]
+        base = os.path.join(self.directory, '{:.6f}-{}-{}ms'.format(
+            time.time(), '-'.join(tags), int(duration * 1000)
+        ))
+        profile.dump_stats(base + '.prof')
+        if snapshot is not None:
+            snapshot.dump(base + '.tracemalloc')
+
+        self.rotate()
+        return base + '.prof'
+
+    def save_stack(self, name, frame):
+        """Save stack of slow call and rotate old ones.
+
+        :param name: `str` transform name.
+        :param frame: frame object of call.
+        :returns: `str` path of stack.
+        """
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+
+        path = os.path.join(self.directory, '{:.6f}-{}-{}ms.stack'.format(
+            time.time(), name, int(self.threshold * 1000)
+        ))
+        with open(path, 'w') as stream:
+            stream.writelines(traceback.format_stack(frame))
+
+        self.rotate()
+        return path
+
+    def rotate(self):
+        """Remove profiles except `keep` newest."""
+        for extension in ('.prof', '.tracemalloc', '.stack'):
+            paths = sorted(
+                glob.glob(os.path.join(self.directory, '*' + extension))
+            )
+            for path in paths[:-self.keep or None]:
+                try:
+                    os.remove(path)
+                except OSError:  # pragma: no cover
+                    pass
@@ -0,0 +1,363 @@
+# coding=utf-8
+
+import os
+import threading
+import time
+
+from . import exceptions, metrics
+
+
+class Limit(object):
+
+    """Upstream limit settings."""
+
+    def __init__(self, rate=None, burst=None, concurrency=None, timeout=None,
+                 lease=None):
+        """Override initialization instance.
+
+        :param rate (optional): `float` tokens refilled per second,
+            `None` disables token bucket.
+        :param burst (optional): `int` bucket capacity, default is `rate`.
+        :param concurrency (optional): `int` max calls in flight,
+            `None` disables semaphore.
+        :param timeout (optional): `float` max seconds to wait for a slot,
+            `None` waits forever.
+        :param lease (optional): `float` max seconds slot is held, slots
+            of longer calls are freed, `None` frees slots only when
+            holding process is gone.
+        """
+        if rate is not None and rate <= 0:
+            raise ValueError('Rate should be positive.')
+        if concurrency is not None and concurrency < 1:
+            raise ValueError('Concurrency should be at least 1.')
+
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate or 1, 1)
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.lease = lease
+
+
+def _alive(pid):
+    """Check process of this host is running.
+
+    :param pid: `int` process id.
+    :returns: `bool`.
+    """
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class MemoryStore(object):
+
+    """Limiter state store local to process."""
+
+    def __init__(self):
+        """Override initialization instance."""
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def update(self, key, func):
+        """Atomically update state of key.
+
+        :param key: `str` upstream name.
+        :param func: callable `func(state)` returns `(state, result)`,
+            state is `None` for unknown key.
+        :returns: result of `func`.
+        """
+        with self._lock:
+            state, result = func(self._states.get(key))
+            self._states[key] = state
+        return result
+
+
+class SQLiteStore(object):
+
+    """Limiter state store shared between processes of one host."""
+
+    def __init__(self, path, timeout=5.0):
+        """Override initialization instance.
+
+        :param path: `str` path to SQLite database file.
+        :param timeout (optional): `float` seconds to wait for file lock.
+        """
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+
+        self._connection().execute(
+            'CREATE TABLE IF NOT EXISTS ratelimit'
+            ' (key TEXT PRIMARY KEY, state TEXT NOT NULL)'
+        )
+
+    def _connection(self):
+        """Get connection of current thread.
+
+        :returns: `sqlite3.Connection` instance.
+        """
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            import sqlite3
+
+            connection = sqlite3.connect(
+                self.path, timeout=self.timeout, isolation_level=None
+            )
+            self._local.connection = connection
+        return connection
+
+    def update(self, key, func):
+        """Atomically update state of key.
+
+        :param key: `str` upstream name.
+        :param func: callable `func(state)` returns `(state, result)`,
+            state is `None` for unknown key.
+        :returns: result of `func`.
+        """
+        import json
+
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute(
+                'SELECT state FROM ratelimit WHERE key = ?', (key,)
+            ).fetchone()
+            state, result = func(json.loads(row[0]) if row else None)
+            connection.execute(
+                'INSERT OR REPLACE INTO ratelimit (key, state) VALUES (?, ?)',
+                (key, json.dumps(state))
+            )
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        return result
+
+
+class Slot(object):
+
+    """Acquired upstream slot, sync and async context manager."""
+
+    def __init__(self, limiter, name, tokens=1, timeout=None):
+        """Override initialization instance.
+
+        :param limiter: `ratelimit.RateLimiter` instance.
+        :param name: `str` upstream name.
+        :param tokens (optional): `int` tokens taken by call.
+        :param timeout (optional): `float` max seconds to wait.
+        """
+        self.limiter = limiter
+        self.name = name
+        self.tokens = tokens
+        self.timeout = timeout
+
+    def __enter__(self):
+        self.limiter.acquire(self.name, self.tokens, self.timeout)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.limiter.release(self.name)
+
+    async def __aenter__(self):
+        await self.limiter.acquire_async(self.name, self.tokens, self.timeout)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.limiter.release(self.name)
+
+
+class RateLimiter(object):
+
+    """Token bucket and concurrency semaphore keyed by upstream name."""
+
+    def __init__(self, limits=None, store=None, poll_interval=0.01):
+        """Override initialization instance.
+
+        :param limits (optional): `dict` upstream name to `ratelimit.Limit`.
+        :param store (optional): state store, default is
+            `ratelimit.MemoryStore` instance.
+        :param poll_interval (optional): `float` seconds between retries
+            while all concurrency slots are busy.
+        """
+        self.limits = dict(limits or {})
+        self.store = store if store is not None else MemoryStore()
+        self.poll_interval = poll_interval
+
+    def configure(self, name, **kwargs):
+        """Set limit for upstream.
+
+        :param name: `str` upstream name.
+        :param kwargs: `ratelimit.Limit` arguments.
+        :returns: `ratelimit.Limit` instance.
+        """
+        limit = self.limits[name] = Limit(**kwargs)
+        return limit
+
+    def _take(self, name, limit, tokens):
+        """Try to take tokens and concurrency slot.
+
+        Time is read inside `store.update`, so refills of concurrent
+        processes are ordered. Each slot is a lease of holding process,
+        leases of dead processes and expired leases are freed.
+
+        :returns: `tuple` of seconds to wait (`0` when taken) and utilisation.
+        """
+        def take(state):
+            now = time.time()
+            if state is None:
+                state = {'tokens': float(limit.burst), 'stamp': now}
+            state['leases'] = [
+                (pid, expires) for pid, expires in state.get('leases', ())
+                if (expires is None or expires > now) and _alive(pid)
+            ]
+            active = len(state['leases'])
+
+            if limit.rate is not None:
+                state['tokens'] = min(
+                    float(limit.burst),
+                    state['tokens'] + (now - state['stamp']) * limit.rate
+                )
+                state['stamp'] = now
+
+            if limit.concurrency is not None and active >= limit.concurrency:
+                return state, (self.poll_interval, 1.0)
+
+            if limit.rate is not None and state['tokens'] < tokens:
+                wait = (tokens - state['tokens']) / limit.rate
+                return state, (wait, 1.0)
+
+            if limit.rate is not None:
+                state['tokens'] -= tokens
+            state['leases'].append((
+                os.getpid(),
+                None if limit.lease is None else now + limit.lease
+            ))
+
+            if limit.concurrency is not None:
+                utilisation = float(active + 1) / limit.concurrency
+            else:
+                utilisation = 1 - state['tokens'] / limit.burst
+            return state, (0, utilisation)
+
+        return self.store.update(name, take)
+
+    def _prepare(self, name, tokens, timeout):
+        """Get limit and deadline for acquiring.
+
+        :returns: `tuple` of `ratelimit.Limit` or `None` and deadline.
+        """
+        limit = self.limits.get(name)
+        if limit is None:
+            return None, None
+
+        if limit.rate is not None and tokens > limit.burst:
+            raise ValueError(
+                'Can not take {} tokens from bucket of {}.'.format(
+                    tokens, limit.burst
+                )
+            )
+
+        timeout = limit.timeout if timeout is None else timeout
+        deadline = None if timeout is None else time.time() + timeout
+        return limit, deadline
+
+    def _next_wait(self, name, wait, deadline):
+        """Check deadline before waiting.
+
+        :returns: `float` seconds to sleep.
+        """
+        if deadline is not None:
+            left = deadline - time.time()
+            if left <= 0:
+                metrics.emit('ratelimit.rejected', 1, upstream=name)
+                raise exceptions.RateLimitError(
+                    'Upstream "{}" is over limit.'.format(name)
+                )
+            wait = min(wait, left)
+        return wait
+
+    def _acquired(self, name, started, utilisation):
+        """Report acquired slot."""
+        metrics.emit('ratelimit.wait', time.time() - started, upstream=name)
+        metrics.emit('ratelimit.utilisation', utilisation, upstream=name)
+
+    def acquire(self, name, tokens=1, timeout=None):
+        """Block until upstream call is allowed.
+
+        :param name: `str` upstream name, unknown names are not limited.
+        :param tokens (optional): `int` tokens taken by call.
+        :param timeout (optional): `float` max seconds to wait, default
+            is timeout of limit.
+        :raises: `exceptions.RateLimitError` on timeout.
+        """
+        limit, deadline = self._prepare(name, tokens, timeout)
+        if limit is None:
+            return
+
+        started = time.time()
+        while True:
+            wait, utilisation = self._take(name, limit, tokens)
+            if not wait:
+                self._acquired(name, started, utilisation)
+                return
+            time.sleep(self._next_wait(name, wait, deadline))
+
+    async def acquire_async(self, name, tokens=1, timeout=None):
+        """Wait without blocking event loop until upstream call is allowed.
+
+        :param name: `str` upstream name, unknown names are not limited.
+        :param tokens (optional): `int` tokens taken by call.
+        :param timeout (optional): `float` max seconds to wait, default
+            is timeout of limit.
+        :raises: `exceptions.RateLimitError` on timeout.
+        """
+        import asyncio
+
+        limit, deadline = self._prepare(name, tokens, timeout)
+        if limit is None:
+            return
+
+        started = time.time()
+        while True:
+            wait, utilisation = self._take(name, limit, tokens)
+            if not wait:
+                self._acquired(name, started, utilisation)
+                return
+            await asyncio.sleep(self._next_wait(name, wait, deadline))
+
+    def release(self, name):
+        """Release concurrency slot of upstream.
+
+        :param name: `str` upstream name.
+        """
+        if name not in self.limits:
+            return
+
+        pid = os.getpid()
+
+        def release(state):
+            leases = [] if state is None else state.get('leases', [])
+            for index, lease in enumerate(leases):
+                if lease[0] == pid:
+                    del leases[index]
+                    break
+            return state, None
+
+        self.store.update(name, release)
+
+    def limit(self, name, tokens=1, timeout=None):
+        """Create context manager holding upstream slot.
+
+        :param name: `str` upstream name.
+        :param tokens (optional): `int` tokens taken by call.
+        :param timeout (optional): `float` max seconds to wait.
+        :returns: `ratelimit.Slot` instance, usable with `with`
+            and `async with`.
+        """
+        return Slot(self, name, tokens, timeout)
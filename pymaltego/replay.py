@@ -0,0 +1,192 @@
+# coding=utf-8
+
+import bisect
+import json
+import threading
+import time
+from concurrent import futures
+from urllib import request as urllib_request
+
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+
+
+class Recorder(object):
+
+    """Archive of incoming request payloads in JSON lines file."""
+
+    def __init__(self, path):
+        """Override initialization instance.
+
+        :param path: `str` path to archive file, records are appended.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+
+    def record(self, payload, started, duration, transform=None):
+        """Append request to archive.
+
+        :param payload: `str` or `bytes` XML request.
+        :param started: `float` UNIX time of request.
+        :param duration: `float` seconds spent handling request.
+        :param transform (optional): `str` transform name.
+        """
+        if isinstance(payload, bytes):
+            payload = payload.decode('utf-8')
+
+        line = json.dumps({
+            'started': started, 'duration': duration,
+            'transform': transform, 'payload': payload
+        })
+        with self._lock:
+            with open(self.path, 'a') as f:
+                f.write(line + '\n')
+
+
+def load_records(path):
+    """Load recorded requests.
+
+    :param path: `str` path to archive file.
+    :returns: `list` of `dict` records.
+    """
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class Report(object):
+
+    """Latency and throughput of replay."""
+
+    def __init__(self, latencies, errors, elapsed):
+        """Override initialization instance.
+
+        :param latencies: `list` of `float` seconds per request.
+        :param errors: `int` count of failed requests.
+        :param elapsed: `float` wall time seconds of replay.
+        """
+        self.latencies = sorted(latencies)
+        self.errors = errors
+        self.elapsed = elapsed
+
+    @property
+    def count(self):
+        """Count of replayed requests."""
+        return len(self.latencies)
+
+    @property
+    def throughput(self):
+        """Requests per second."""
+        return self.count / self.elapsed if self.elapsed else 0.0
+
+    def percentile(self, percent):
+        """Latency percentile.
+
+        :param percent: `float` from 0 to 100.
+        :returns: `float` seconds.
+        """
+        if not self.latencies:
+            return 0.0
+        index = int(round(percent / 100.0 * (self.count - 1)))
+        return self.latencies[index]
+
+    def histogram(self, buckets=DEFAULT_BUCKETS):
+        """Latency histogram.
+
+        :param buckets (optional): sorted upper bounds in seconds.
+        :returns: `list` of `(upper bound, count)`, last bound is `None`.
+        """
+        counts = [0] * (len(buckets) + 1)
+        for latency in self.latencies:
+            counts[bisect.bisect_left(buckets, latency)] += 1
+        return list(zip(list(buckets) + [None], counts))
+
+    def summary(self):
+        """Human-readable report.
+
+        :returns: `str` summary.
+        """
+        lines = [
+            'requests: {} errors: {} elapsed: {:.3f}s throughput: {:.1f}/s'
+            .format(self.count, self.errors, self.elapsed, self.throughput),
+            'p50: {:.2f}ms p90: {:.2f}ms p99: {:.2f}ms max: {:.2f}ms'.format(
+                *[self.percentile(p) * 1000 for p in (50, 90, 99, 100)]
+            ),
+        ]
+        for bound, count in self.histogram():
+            bound = '+Inf' if bound is None else '{}ms'.format(bound * 1000)
+            lines.append('<= {:>8} {}'.format(bound, count))
+        return '\n'.join(lines)
+
+
+class Replayer(object):
+
+    """Replay recorded requests against transform or HTTP endpoint."""
+
+    def __init__(self, records, concurrency=1, rate=None):
+        """Override initialization instance.
+
+        :param records: `list` of `dict` records or `str` archive path.
+        :param concurrency (optional): `int` requests in flight.
+        :param rate (optional): `float` max requests per second,
+            `None` replays as fast as possible.
+        """
+        if not isinstance(records, list):
+            records = load_records(records)
+        self.records = records
+        self.concurrency = concurrency
+        self.rate = rate
+
+    def _sender(self, target, stubs):
+        """Create function sending one payload."""
+        if isinstance(target, str):
+            def send(payload):
+                http_request = urllib_request.Request(
+                    target, data=payload.encode('utf-8'),
+                    headers={'Content-Type': 'text/xml'}
+                )
+                with urllib_request.urlopen(http_request) as response:
+                    return response.read()
+            return send
+
+        if stubs:
+            target = type(
+                target.__name__, (target,),
+                {'stubs': dict(target.stubs, **stubs)}
+            )
+        return target.handle
+
+    def run(self, target, stubs=None):
+        """Replay all records.
+
+        :param target: `transforms.BaseTransform` subclass or `str` URL.
+        :param stubs (optional): `dict` upstream name to callable
+            replacing upstream call of transform.
+        :returns: `replay.Report` instance.
+        """
+        send = self._sender(target, stubs)
+        latencies = []
+        errors = [0]
+        lock = threading.Lock()
+
+        def replay(payload):
+            started = time.time()
+            try:
+                send(payload)
+            except Exception:
+                with lock:
+                    errors[0] += 1
+                return
+            with lock:
+                latencies.append(time.time() - started)
+
+        started = time.time()
+        with futures.ThreadPoolExecutor(self.concurrency) as executor:
+            for index, record in enumerate(self.records):
+                if self.rate:
+                    delay = started + index / self.rate - time.time()
+                    if delay > 0:
+                        time.sleep(delay)
+                executor.submit(replay, record['payload'])
+
+        return Report(latencies, errors[0], time.time() - started)
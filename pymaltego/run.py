@@ -0,0 +1,118 @@
+# coding=utf-8
+
+"""Run transform in fresh process.
+
+Usage: python -m pymaltego.run module:Transform [XML | -]
+       python -m pymaltego.run --local module:Transform VALUE [FIELDS]
+       python -m pymaltego.run --connect SOCKET module:Transform VALUE [FIELDS]
+       python -m pymaltego.run --serve SOCKET
+
+Request XML is read from argument or from stdin, response is written
+to stdout. With --local arguments are Maltego local transform entity
+value and fields as key=val#key2=val2. With --connect the call is
+forwarded to warm process started with --serve, transform runs in
+launcher process if no process listens on socket.
+"""
+
+import importlib
+import sys
+
+
+def load_transform(path):
+    """Import transform class.
+
+    :param path: `str` path as `module:Class`, class may be dotted.
+    :returns: `transforms.BaseTransform` subclass.
+    """
+    module_name, _, class_name = path.partition(':')
+    if not module_name or not class_name:
+        raise ValueError(
+            'Transform path should be "module:Class", got "{}".'.format(path)
+        )
+
+    transform = importlib.import_module(module_name)
+    try:
+        for name in class_name.split('.'):
+            transform = getattr(transform, name)
+    except AttributeError:
+        raise ValueError(
+            'Module "{}" has no transform "{}".'.format(
+                module_name, class_name
+            )
+        )
+    return transform
+
+
+def main(argv=None, stdin=None, stdout=None):
+    """Run transform from command line.
+
+    :param argv (optional): `list` arguments without program name.
+    :param stdin (optional): binary file-like request source.
+    :param stdout (optional): binary file-like response target.
+    :returns: `int` exit code.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    stdin = sys.stdin.buffer if stdin is None else stdin
+    stdout = sys.stdout.buffer if stdout is None else stdout
+
+    if argv and argv[0] in ('--local', '--connect', '--serve'):
+        return local_main(argv, stdout)
+
+    if not argv or len(argv) > 2:
+        return usage()
+
+    transform = load_transform(argv[0])
+
+    if len(argv) == 2 and argv[1] != '-':
+        xml = argv[1].encode('utf-8')
+    else:
+        xml = stdin.read()
+
+    stdout.write(transform.handle(xml))
+    stdout.flush()
+    return 0
+
+
+def usage():
+    """Write usage to stderr.
+
+    :returns: `int` exit code.
+    """
+    sys.stderr.write(__doc__.lstrip())
+    return 2
+
+
+def local_main(argv, stdout):
+    """Run local transform from command line.
+
+    :param argv: `list` arguments starting with mode option.
+    :param stdout: binary file-like response target.
+    :returns: `int` exit code.
+    """
+    from pymaltego import local
+
+    mode, args = argv[0], argv[1:]
+
+    if mode == '--serve':
+        if len(args) != 1:
+            return usage()
+        local.serve(args[0], load_transform)
+        return 0
+
+    if mode == '--connect':
+        if not args:
+            return usage()
+        path, args = args[0], args[1:]
+    else:
+        path = None
+
+    if len(args) not in (2, 3):
+        return usage()
+
+    if path is None or not local.forward(path, args[0], args[1:], stdout):
+        local.run(load_transform(args[0]), args[1:], stdout)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
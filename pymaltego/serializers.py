@@ -0,0 +1,305 @@
+# coding=utf-8
+
+"""Fast XML serializer building strings without `lxml`.
+
+Output is byte-identical to `to_xml()` of objects. Objects of unknown
+subclasses and `etree.Element` nodes are serialized with `lxml`.
+"""
+
+import sys
+
+from . import entities, messages
+
+INVALID_MESSAGE = (
+    'All strings must be XML compatible: Unicode or ASCII, no NULL bytes or '
+    'control characters'
+)
+INVALID_CHARACTERS = dict.fromkeys(
+    [code for code in range(0x20) if code not in (0x9, 0xa, 0xd)] +
+    list(range(0xd800, 0xe000)) + [0xfffe, 0xffff]
+)
+
+
+def check_text(value):
+    """Check text has no characters `lxml` refuses to serialize.
+
+    :param value: `str` text.
+    :raises ValueError: text is not XML compatible.
+    """
+    if not value.isprintable():
+        if len(value.translate(INVALID_CHARACTERS)) != len(value):
+            raise ValueError(INVALID_MESSAGE)
+
+
+def escape_text(value):
+    """Escape node text.
+
+    :param value: `str` text.
+    :returns: `str` escaped text.
+    :raises ValueError: text is not XML compatible.
+    """
+    check_text(value)
+    if '&' in value:
+        value = value.replace('&', '&amp;')
+    if '<' in value:
+        value = value.replace('<', '&lt;')
+    if '>' in value:
+        value = value.replace('>', '&gt;')
+    if '\r' in value:
+        value = value.replace('\r', '&#13;')
+    return value
+
+
+def escape_attribute(value):
+    """Escape attribute value.
+
+    :param value: `str` attribute value.
+    :returns: `str` escaped value.
+    :raises ValueError: value is not XML compatible.
+    """
+    value = escape_text(value)
+    if '"' in value:
+        value = value.replace('"', '&quot;')
+    if '\n' in value:
+        value = value.replace('\n', '&#10;')
+    if '\t' in value:
+        value = value.replace('\t', '&#9;')
+    return value
+
+
+def text_node(tag, value, attributes=''):
+    """Serialize node with text, empty node if value is false.
+
+    :param tag: `str` tag.
+    :param value: node value.
+    :param attributes (optional): `str` serialized attributes.
+    :returns: `str` XML.
+    """
+    if not value:
+        return '<{}{}/>'.format(tag, attributes)
+    return '<{0}{1}>{2}</{0}>'.format(
+        tag, attributes, escape_text(entities.text(value))
+    )
+
+
+def cdata(value):
+    """Serialize CDATA section, text containing `]]>` is escaped instead.
+
+    :param value: `str` text.
+    :returns: `str` XML.
+    :raises ValueError: text is not XML compatible.
+    """
+    if ']]>' in value:
+        return escape_text(value)
+    check_text(value)
+    return '<![CDATA[{}]]>'.format(value)
+
+
+def label_xml(label):
+    """Serialize `entities.Label` instance.
+
+    :returns: `str` XML.
+    """
+    return '<Label Name="{}" Type="{}">{}</Label>'.format(
+        escape_attribute(label.name), escape_attribute(label.content_type),
+        cdata(label.value)
+    )
+
+
+def field_xml(field):
+    """Serialize `entities.Field` instance.
+
+    :returns: `str` XML.
+    """
+    attributes = ' Name="{}" DisplayName="{}"'.format(
+        escape_attribute(field.name), escape_attribute(field.display_name)
+    )
+    if field.matching_rule is not None:
+        attributes += ' MatchingRule="{}"'.format(
+            escape_attribute(field.matching_rule)
+        )
+    return text_node('Field', field.value, attributes)
+
+
+def entity_xml(entity):
+    """Serialize `entities.Entity` instance.
+
+    :returns: `str` XML.
+    """
+    parts = [
+        '<Entity Type="{}">'.format(escape_attribute(entity.name)),
+        text_node('Value', entity.value)
+    ]
+
+    if entity.weight is not None:
+        parts.append(text_node('Weight', entity.weight))
+
+    fields = [object_xml(field) for field in entity.fields if field.value]
+    if fields:
+        parts.append('<AdditionalFields>')
+        parts.extend(fields)
+        parts.append('</AdditionalFields>')
+
+    if entity.labels:
+        parts.append('<DisplayInformation>')
+        parts.extend(object_xml(label) for label in entity.labels)
+        parts.append('</DisplayInformation>')
+
+    if entity.icon_url:
+        parts.append(text_node('IconURL', entity.icon_url))
+
+    parts.append('</Entity>')
+    return ''.join(parts)
+
+
+def ui_message_xml(message):
+    """Serialize `entities.UIMessage` instance.
+
+    :returns: `str` XML.
+    """
+    attributes = ' MessageType="{}"'.format(
+        escape_attribute(message.message_type)
+    )
+    if message.value is None:
+        return '<UIMessage{}/>'.format(attributes)
+    return '<UIMessage{}>{}</UIMessage>'.format(
+        attributes, escape_text(message.value)
+    )
+
+
+def raw_xml(xml):
+    """Serialize `bytes` of serialized entities verbatim.
+
+    :returns: `str` XML.
+    """
+    return xml.decode('utf-8')
+
+
+def fragment_xml(fragment):
+    """Serialize `entities.Fragment` instance verbatim.
+
+    :returns: `str` XML.
+    """
+    return fragment.xml.decode('utf-8')
+
+
+SERIALIZERS = {
+    entities.Label: label_xml,
+    entities.FrozenLabel: label_xml,
+    entities.Field: field_xml,
+    entities.FrozenField: field_xml,
+    entities.Entity: entity_xml,
+    entities.FrozenEntity: entity_xml,
+    entities.UIMessage: ui_message_xml,
+    entities.Fragment: fragment_xml,
+    bytes: raw_xml,
+}
+
+
+def object_xml(obj):
+    """Serialize object or `etree.Element` node.
+
+    :param obj: `entities.XMLObject` subclass instance or node.
+    :returns: `str` XML.
+    """
+    serializer = SERIALIZERS.get(type(obj))
+    if serializer is not None:
+        return serializer(obj)
+
+    etree = sys.modules.get('lxml.etree')
+    if etree is not None and etree.iselement(obj):
+        return etree.tostring(obj).decode('ascii')
+    return obj.to_xml().decode('ascii')
+
+
+def _message_body(message):
+    """Generate XML parts of message content."""
+    if message.ui_messages:
+        yield '<UIMessages>'
+        for ui_message in message.ui_messages:
+            yield object_xml(ui_message)
+        yield '</UIMessages>'
+
+    if isinstance(message, messages.TransformResponse):
+        empty = True
+        for entity in message._iter_entities():
+            if empty:
+                yield '<Entities>'
+                empty = False
+            yield object_xml(entity)
+        yield '<Entities/>' if empty else '</Entities>'
+
+    elif isinstance(message, messages.TransformRequest):
+        yield '<Entities>' if message.entities else '<Entities/>'
+        for entity in message.entities:
+            yield object_xml(entity)
+        if message.entities:
+            yield '</Entities>'
+
+        if message.fields:
+            yield '<TransformFields>'
+            for name, value in message.fields.items():
+                yield text_node(
+                    'Field', value, ' Name="{}"'.format(escape_attribute(name))
+                )
+            yield '</TransformFields>'
+
+        yield '<Limits SoftLimit="{}" HardLimit="{}"/>'.format(
+            message.soft_limit, message.hard_limit
+        )
+
+    elif isinstance(message, messages.TransformException):
+        yield '<Exceptions>' if message.errors else '<Exceptions/>'
+        for error, code in message.errors:
+            attributes = ''
+            if code is not None:
+                attributes = ' code="{}"'.format(escape_attribute(str(code)))
+            yield text_node('Exception', error, attributes)
+        if message.errors:
+            yield '</Exceptions>'
+
+
+def iter_message(message):
+    """Generate XML parts of message.
+
+    :param message: `messages.MaltegoMessage` subclass instance.
+    :returns: iterator of `str` XML parts.
+    """
+    tag = 'Maltego{}Message'.format(message.__class__.__name__)
+    yield '<MaltegoMessage>'
+
+    body = _message_body(message)
+    for part in body:
+        yield '<{}>'.format(tag)
+        yield part
+        break
+    else:
+        yield '<{}/></MaltegoMessage>'.format(tag)
+        return
+
+    for part in body:
+        yield part
+    yield '</{}></MaltegoMessage>'.format(tag)
+
+
+MESSAGES = (
+    messages.TransformRequest,
+    messages.TransformResponse,
+    messages.TransformException,
+)
+
+
+def to_xml(obj):
+    """Serialize object or message to XML string.
+
+    :param obj: `entities.XMLObject` or `messages.MaltegoMessage`
+        subclass instance.
+    :returns: `bytes` XML, equal to `obj.to_xml()`.
+    """
+    if type(obj) in MESSAGES:
+        xml = ''.join(iter_message(obj)).encode('ascii', 'xmlcharrefreplace')
+        limits = getattr(obj, 'limits', None)
+        if limits is not None:
+            limits.check_bytes(len(xml))
+        return xml
+    return object_xml(obj).encode('ascii', 'xmlcharrefreplace')
@@ -0,0 +1,136 @@
+# coding=utf-8
+
+"""Serialized entities buffer spilling to disk above memory limit."""
+
+import hashlib
+import tempfile
+
+from . import entities, serializers
+
+DEFAULT_MAX_MEMORY = 16 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+DIGEST_SIZE = 16
+
+
+class EntitySpool(object):
+
+    """Entities serialized on add, kept in memory up to limit, rest on disk.
+
+    Pass instance as entities of `messages.TransformResponse`, entities
+    are streamed back in order as `entities.Fragment` chunks.
+    """
+
+    def __init__(self, max_memory=DEFAULT_MAX_MEMORY, dedupe=False,
+                 limits=None, directory=None, chunk_size=CHUNK_SIZE):
+        """Override initialization instance.
+
+        :param max_memory (optional): `int` bytes kept in memory before
+            spilling to temporary file.
+        :param dedupe (optional): `bool` skip entities with the same XML,
+            digests of added entities are kept in memory.
+        :param limits (optional): `guards.SizeLimits` instance, checked
+            on add.
+        :param directory (optional): `str` directory of temporary file.
+        :param chunk_size (optional): `int` approximate size in bytes of
+            fragments read back.
+        """
+        self.file = tempfile.SpooledTemporaryFile(
+            max_size=max_memory, dir=directory
+        )
+        self.dedupe = dedupe
+        self.limits = limits
+        self.chunk_size = chunk_size
+        self.count = 0
+        self.size = 0
+        self._digests = set()
+        self._chunks = []
+        self._chunk_start = 0
+        self._chunk_count = 0
+
+    @property
+    def spilled(self):
+        """Check entities are spilled to disk.
+
+        :returns: `bool`.
+        """
+        return self.file._rolled
+
+    def add(self, entity):
+        """Serialize and buffer entity.
+
+        :param entity: `entities.Entity` instance, entity node,
+            `entities.Fragment` instance or `bytes` of serialized entities.
+        :returns: `bool` `False` if entity is duplicate.
+        :raises: `exceptions.SizeLimitError` if limit is exceeded.
+        """
+        if isinstance(entity, entities.Fragment):
+            xml, count = entity.xml, entity.count
+        elif isinstance(entity, bytes):
+            xml, count = entity, entities.Fragment(entity).count
+        else:
+            xml = serializers.object_xml(entity).encode(
+                'ascii', 'xmlcharrefreplace'
+            )
+            count = 1
+
+        if self.dedupe:
+            digest = hashlib.blake2b(xml, digest_size=DIGEST_SIZE).digest()
+            if digest in self._digests:
+                return False
+            self._digests.add(digest)
+
+        if self.limits is not None:
+            self.limits.check_entities(self.count + count)
+            if not isinstance(entity, (bytes, entities.Fragment)):
+                self.limits.check_entity(entity)
+            self.limits.check_bytes(self.size + len(xml))
+
+        if self.file.tell() != self.size:
+            self.file.seek(self.size)
+        self.file.write(xml)
+        self.size += len(xml)
+        self.count += count
+
+        self._chunk_count += count
+        if self.size - self._chunk_start >= self.chunk_size:
+            self._chunks.append((self.size, self._chunk_count))
+            self._chunk_start = self.size
+            self._chunk_count = 0
+        return True
+
+    def extend(self, items):
+        """Serialize and buffer entities.
+
+        :param items: iterable of entities, see `add`.
+        :returns: `int` count of added items.
+        """
+        return sum(1 for item in items if self.add(item))
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        """Read buffered entities in order.
+
+        :returns: iterator of `entities.Fragment` instances ending on
+            entity boundaries.
+        """
+        chunks = list(self._chunks)
+        if self.size > self._chunk_start:
+            chunks.append((self.size, self._chunk_count))
+
+        start = 0
+        for end, count in chunks:
+            self.file.seek(start)
+            yield entities.Fragment(self.file.read(end - start), count)
+            start = end
+
+    def close(self):
+        """Remove buffered entities."""
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
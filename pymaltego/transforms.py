@@ -1,12 +1,29 @@
 # coding=utf-8
 
-from . import messages
+import time
+
+from . import (
+    cache, entities, exceptions, messages, ratelimit, serializers
+)
 
 
 class BaseTransform(object):
 
     """Base transform object."""
 
+    rate_limiter = ratelimit.RateLimiter()
+    size_limits = None
+    validate_fragments = False
+    handled_exceptions = (exceptions.PyMaltegoException,)
+    stubs = {}
+    recorder = None
+    profiler = None
+    delta_store = None
+    delta_summary = True
+    request_cache = None
+    response_cache = None
+    graph = None
+
     def __init__(self, message):
         """Initialization class.
 
@@ -18,17 +35,257 @@ class BaseTransform(object):
                 ' `messages.MaltegoMessage` subclasses.'
             )
         self.message = message
+        self._linked = {}
 
     def transform(self):
         """Do transform.
 
-        :returns: iterable object of `entities.Entity` instances.
+        :returns: iterable object of `entities.Entity` instances, entity
+            nodes or serialized entities.
         """
         raise NotImplementedError('Object should contains method `transform`.')
 
+    @classmethod
+    def handle(cls, xml):
+        """Parse request, do transform and serialize response.
+
+        :param xml: `str` XML request.
+        :returns: `str` XML response or exception message.
+        """
+        started = time.time()
+        try:
+            if cls.profiler is None:
+                return cls._handle(xml)
+            stats = {}
+            return cls.profiler.run(
+                cls.__name__, cls._handle, xml, stats,
+                count=lambda: stats.get('count')
+            )
+        finally:
+            if cls.recorder is not None:
+                cls.recorder.record(
+                    xml, started, time.time() - started, cls.__name__
+                )
+
+    @classmethod
+    def _handle(cls, xml, stats=None):
+        """Handle request without recording and profiling."""
+        key = None
+        if cls.request_cache is not None or cls._caches_responses():
+            key = cache.payload_key(xml)
+
+        if cls._caches_responses():
+            cached = cls.response_cache.get(cls.qualified_name(), key)
+            if cached is not None:
+                return cached
+
+        try:
+            if cls.request_cache is not None:
+                message = cls.request_cache.parse(
+                    xml, key, limits=cls.size_limits
+                )
+            else:
+                message = messages.TransformRequest.from_xml(
+                    xml, limits=cls.size_limits
+                )
+            if stats is not None:
+                stats['count'] = len(message.entities)
+            response = cls(message).to_response()
+            if isinstance(response, messages.TransformException):
+                return response.to_xml()
+            result = serializers.to_xml(response)
+        except cls.handled_exceptions as e:
+            return cls.exception_response(e).to_xml()
+
+        if cls._caches_responses():
+            cls.response_cache.set(cls.qualified_name(), key, result)
+        return result
+
+    @classmethod
+    def qualified_name(cls):
+        """Get name of transform unique across modules.
+
+        :returns: `str` name as `module.Class`.
+        """
+        return '{}.{}'.format(cls.__module__, cls.__qualname__)
+
+    @classmethod
+    def _caches_responses(cls):
+        """Check responses are cached.
+
+        Delta responses are never cached, neither are responses of
+        transforms recording `graph`, as cache hits skip transform.
+
+        :returns: `bool`.
+        """
+        return (
+            cls.response_cache is not None and cls.delta_store is None and
+            cls.graph is None
+        )
+
+    @classmethod
+    def exception_response(cls, exception):
+        """Map exception to Maltego exception message.
+
+        :param exception: `Exception` instance.
+        :returns: `messages.TransformException` instance.
+        """
+        return messages.TransformException.from_exception(exception)
+
     def to_response(self):
         """Create `messages.TransformResponse` instance.
 
-        :returns: `messages.TransformResponse` instance.
+        Exceptions from `handled_exceptions` raised by `transform` are
+        converted by `exception_response`.
+
+        :returns: `messages.TransformResponse` or
+            `messages.TransformException` instance.
+        """
+        if self.profiler is None:
+            return self._to_response()
+        return self.profiler.run(
+            self.__class__.__name__, self._to_response,
+            count=len(self.message.entities)
+        )
+
+    def _to_response(self):
+        """Create response without profiling.
+
+        Iterables without length, e.g. generators of transforms using
+        `yield`, are consumed here, so their exceptions are converted too.
+        Entities are checked against limits here, generators stop at limit.
+        """
+        try:
+            if self.delta_store is not None:
+                return self._to_delta_response()
+            items = self._transform()
+            response = messages.TransformResponse(
+                items, limits=self.size_limits,
+                validate=self.validate_fragments
+            )
+            if (not hasattr(items, '__len__') or
+                    self.size_limits is not None or self.validate_fragments):
+                response.entities = list(response._iter_entities())
+            return response
+        except self.handled_exceptions as e:
+            return self.exception_response(e)
+
+    def _to_delta_response(self):
+        """Create response with entities changed since previous run."""
+        from . import delta
+
+        nodes, unchanged = delta.changed(
+            self.delta_store,
+            delta.request_key(
+                self.qualified_name(), self.message, self.delta_scope()
+            ),
+            self._transform(), self.size_limits
+        )
+
+        ui_messages = []
+        if self.delta_summary:
+            ui_messages.append(entities.UIMessage(
+                '{} new or changed entities, {} unchanged omitted.'.format(
+                    len(nodes), unchanged
+                ),
+                'Inform'
+            ))
+
+        return messages.TransformResponse(
+            nodes, ui_messages, limits=self.size_limits
+        )
+
+    def delta_scope(self):
+        """Get scope of delta state, e.g. graph or session id of caller.
+
+        Override it when several analysts run transform, callers of the
+        same scope share previous results. Default is one shared scope.
+
+        :returns: `str` scope or `None`.
+        """
+        return None
+
+    def _transform(self):
+        """Do transform recording links to `graph`.
+
+        Produced entities not passed to `link` are linked to all request
+        entities, list results are recorded at once, other iterables while
+        consumed.
+        """
+        items = self.transform()
+        if self.graph is None:
+            return items
+
+        recorded = self._iter_linked(items)
+        return list(recorded) if isinstance(items, list) else recorded
+
+    def _iter_linked(self, items):
+        """Iterate items recording links of not linked entities."""
+        for item in items:
+            if (isinstance(item, entities.Entity) and
+                    self._linked.pop(id(item), None) is None):
+                for source in self.message.entities:
+                    self.graph.add_edge(source, item)
+            yield item
+
+    def link(self, target, label=None, source=None, properties=None):
+        """Link produced entity, e.g. `yield self.link(entity, 'owns')`.
+
+        Link properties are set as Maltego link fields of entity, replacing
+        link fields of the same names, and edges are recorded to `graph`
+        if set. Frozen entities are thawed.
+
+        :param target: `entities.Entity` or `entities.FrozenEntity`
+            instance.
+        :param label (optional): `str` link label.
+        :param source (optional): `entities.Entity` instance, default is
+            all request entities.
+        :param properties (optional): `dict` link property name to value.
+        :returns: target `entities.Entity` instance, thawed copy of
+            frozen target.
+        """
+        from . import graph
+
+        if isinstance(target, entities.Frozen):
+            target = target.thaw()
+
+        properties = dict(properties or {})
+        if label is not None:
+            properties[graph.LINK_LABEL] = label
+
+        fields = graph.link_fields(properties)
+        names = set(field.name for field in fields)
+        target.fields[:] = [
+            field for field in target.fields if field.name not in names
+        ]
+        target.fields.extend(fields)
+
+        if self.graph is not None:
+            sources = self.message.entities if source is None else [source]
+            for item in sources:
+                self.graph.add_edge(item, target, properties)
+            self._linked[id(target)] = target
+        return target
+
+    def upstream(self, name, tokens=1, timeout=None):
+        """Hold slot of rate limited upstream.
+
+        :param name: `str` upstream name in `rate_limiter`.
+        :param tokens (optional): `int` tokens taken by call.
+        :param timeout (optional): `float` max seconds to wait.
+        :returns: `ratelimit.Slot` instance, usable with `with`
+            and `async with`.
+        """
+        return self.rate_limiter.limit(name, tokens, timeout)
+
+    def call_upstream(self, name, func, *args, **kwargs):
+        """Call function under upstream limit.
+
+        :param name: `str` upstream name in `rate_limiter`.
+        :param func: callable making upstream request, replaced by
+            `stubs[name]` if present.
+        :returns: result of `func`.
         """
-        return messages.TransformResponse(self.transform())
+        func = self.stubs.get(name, func)
+        with self.upstream(name):
+            return func(*args, **kwargs)
@@ -0,0 +1,144 @@
+# coding=utf-8
+
+from lxml import etree
+
+from . import exceptions
+
+MESSAGE = '*[1][self::MaltegoTransformRequestMessage]'
+ENTITY = MESSAGE + '/Entities/Entity'
+
+ENTITY_RULES = (
+    (
+        '[not(@Type)]',
+        'No "Type" attribute in Entity.'
+    ),
+    (
+        '[not(Value)]',
+        'Missing "Value" tag in Entity.'
+    ),
+    (
+        '/AdditionalFields/*[not(self::Field)]',
+        'Not a "Field" tag in "AdditionalFields".'
+    ),
+    (
+        '/AdditionalFields/Field[not(@Name)]',
+        'No "Name" attribute in Field.'
+    ),
+    (
+        '/DisplayInformation/*[not(self::Label)]',
+        'Not a "Label" tag in "DisplayInformation".'
+    ),
+    (
+        '/DisplayInformation/Label[not(@Name)]',
+        'No "Name" attribute in Label.'
+    ),
+)
+
+REQUEST_RULES = (
+    (
+        'self::*[not(self::MaltegoMessage)]',
+        'Root is not a "MaltegoMessage" tag.'
+    ),
+    (
+        'self::*[not({})]'.format(MESSAGE),
+        'Missing "MaltegoTransformRequestMessage" tag.'
+    ),
+    (
+        '{}[not(Entities)]'.format(MESSAGE),
+        'Request requires "Entities" tag.'
+    ),
+    (
+        '{}/Entities/*[not(self::Entity)]'.format(MESSAGE),
+        'Not an "Entity" tag in "Entities".'
+    ),
+) + tuple(
+    (ENTITY + path, message) for path, message in ENTITY_RULES
+) + (
+    (
+        '{}/TransformFields/Field[not(@Name)]'.format(MESSAGE),
+        'No "Name" attribute in Field'
+    ),
+    (
+        '{}/Limits[@SoftLimit][number(@SoftLimit) !='
+        ' floor(number(@SoftLimit))]'.format(MESSAGE),
+        '"SoftLimit" is not an integer.'
+    ),
+    (
+        '{}/Limits[@HardLimit][number(@HardLimit) !='
+        ' floor(number(@HardLimit))]'.format(MESSAGE),
+        '"HardLimit" is not an integer.'
+    ),
+)
+
+
+class Validator(object):
+
+    """Structural checker with XPath rules compiled once."""
+
+    def __init__(self, rules, max_entities=None):
+        """Override initialization instance.
+
+        :param rules: iterable of `(xpath, message)` pairs, xpath selects
+            invalid nodes relative to root node, `MaltegoMessage` for
+            requests or `Entities` for fragments.
+        :param max_entities (optional): `int` max count of input entities.
+        """
+        self.rules = [
+            (etree.XPath(path), message) for path, message in rules
+        ]
+        self.max_entities = max_entities
+        self._count = etree.XPath('count({})'.format(ENTITY))
+
+    def errors(self, node):
+        """Collect all structural errors.
+
+        :param node: `etree.Element` instance of `MaltegoMessage`.
+        :returns: `list` of `str` errors.
+        """
+        if not etree.iselement(node):
+            raise ValueError('Is not an `etree.Element` instance.')
+
+        errors = []
+
+        if self.max_entities is not None:
+            count = int(self._count(node))
+            if count > self.max_entities:
+                errors.append(
+                    'Too many entities: {} > {}.'.format(
+                        count, self.max_entities
+                    )
+                )
+
+        for xpath, message in self.rules:
+            for invalid in xpath(node):
+                if invalid.sourceline is None:
+                    errors.append(message)
+                else:
+                    errors.append(
+                        'Line {}: {}'.format(invalid.sourceline, message)
+                    )
+
+        return errors
+
+    def validate(self, node):
+        """Check node before loading.
+
+        :param node: `etree.Element` instance of `MaltegoMessage`.
+        :raises: `exceptions.ValidationError` with all errors.
+        """
+        errors = self.errors(node)
+        if errors:
+            raise exceptions.ValidationError(errors)
+
+
+FRAGMENT_RULES = (
+    (
+        '*[not(self::Entity)]',
+        'Not an "Entity" tag in "Entities".'
+    ),
+) + tuple(
+    ('Entity' + path, message) for path, message in ENTITY_RULES
+)
+
+request_validator = Validator(REQUEST_RULES)
+fragment_validator = Validator(FRAGMENT_RULES)
@@ -0,0 +1,391 @@
+# coding=utf-8
+
+import json
+import struct
+
+from . import entities, messages
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+
+def _dump_label(label):
+    return {
+        'name': label.name, 'value': label.value,
+        'content_type': label.content_type
+    }
+
+
+def _load_label(data):
+    return entities.Label(data['value'], data['name'], data['content_type'])
+
+
+def _dump_field(field):
+    return {
+        'name': field.name, 'value': field.value,
+        'display_name': field.display_name,
+        'matching_rule': field.matching_rule
+    }
+
+
+def _load_field(data):
+    return entities.Field(
+        data['name'], data['value'], data['display_name'],
+        data['matching_rule']
+    )
+
+
+def _dump_entity(entity):
+    return {
+        'name': entity.name, 'value': entity.value,
+        'weight': entity.weight, 'icon_url': entity.icon_url,
+        'fields': [_dump_field(field) for field in entity.fields],
+        'labels': [_dump_label(label) for label in entity.labels]
+    }
+
+
+def _load_entity(data):
+    return entities.Entity(
+        data['name'], data['value'], data['weight'], data['icon_url'],
+        [_load_field(field) for field in data['fields']],
+        [_load_label(label) for label in data['labels']]
+    )
+
+
+def _dump_ui_message(message):
+    return {'value': message.value, 'message_type': message.message_type}
+
+
+def _load_ui_message(data):
+    return entities.UIMessage(data['value'], data['message_type'])
+
+
+def _dump_request(message):
+    return {
+        'entities': [_dump_entity(entity) for entity in message.entities],
+        'fields': dict(message.fields),
+        'soft_limit': message.soft_limit,
+        'hard_limit': message.hard_limit
+    }
+
+
+def _load_request(data):
+    message = messages.TransformRequest()
+    message.entities = [_load_entity(entity) for entity in data['entities']]
+    message.fields = data['fields']
+    message.soft_limit = data['soft_limit']
+    message.hard_limit = data['hard_limit']
+    return message
+
+
+def _iter_entities(items):
+    """Iterate entities, nodes and serialized entities are loaded."""
+    for entity in items:
+        if isinstance(entity, entities.Entity):
+            yield entity
+        elif isinstance(entity, (bytes, entities.Fragment)):
+            if isinstance(entity, bytes):
+                entity = entities.Fragment(entity)
+            for node in entity.to_nodes():
+                if isinstance(node.tag, str):
+                    yield entities.Entity.from_node(node)
+        elif entities.etree.iselement(entity):
+            yield entities.Entity.from_node(entity)
+        else:
+            raise ValueError(
+                'Unsupported entity: {}.'.format(type(entity).__name__)
+            )
+
+
+def _dump_response(message):
+    return {
+        'entities': [
+            _dump_entity(entity) for entity in _iter_entities(message.entities)
+        ],
+        'ui_messages': [
+            _dump_ui_message(ui_message) for ui_message in message.ui_messages
+        ]
+    }
+
+
+def _load_response(data):
+    return messages.TransformResponse(
+        [_load_entity(entity) for entity in data['entities']],
+        [_load_ui_message(message) for message in data['ui_messages']]
+    )
+
+
+def _dump_exception(message):
+    return {
+        'errors': [list(error) for error in message.errors],
+        'ui_messages': [
+            _dump_ui_message(ui_message) for ui_message in message.ui_messages
+        ]
+    }
+
+
+def _load_exception(data):
+    return messages.TransformException(
+        [tuple(error) for error in data['errors']],
+        [_load_ui_message(message) for message in data['ui_messages']]
+    )
+
+
+TYPES = {
+    'Label': (entities.Label, _dump_label, _load_label),
+    'Field': (entities.Field, _dump_field, _load_field),
+    'Entity': (entities.Entity, _dump_entity, _load_entity),
+    'UIMessage': (entities.UIMessage, _dump_ui_message, _load_ui_message),
+    'TransformRequest': (
+        messages.TransformRequest, _dump_request, _load_request
+    ),
+    'TransformResponse': (
+        messages.TransformResponse, _dump_response, _load_response
+    ),
+    'TransformException': (
+        messages.TransformException, _dump_exception, _load_exception
+    ),
+}
+
+
+def dump(obj):
+    """Convert object to plain data.
+
+    :param obj: `entities.XMLObject` subclass instance.
+    :returns: `dict` with `str`, `int`, `list`, `dict` and `None` values.
+    """
+    for name, (cls, dumper, _) in TYPES.items():
+        if isinstance(obj, cls):
+            return {'type': name, 'data': dumper(obj)}
+
+    raise ValueError('Unsupported type: {}.'.format(type(obj).__name__))
+
+
+def load(data):
+    """Create object from plain data.
+
+    :param data: `dict` created by `wire.dump`.
+    :returns: `entities.XMLObject` subclass instance.
+    """
+    try:
+        _, _, loader = TYPES[data['type']]
+    except (KeyError, TypeError):
+        raise ValueError('Unsupported data.')
+    return loader(data['data'])
+
+
+class JSONCodec(object):
+
+    """JSON codec."""
+
+    name = 'json'
+
+    def encode(self, data):
+        """Encode plain data.
+
+        :param data: plain data.
+        :returns: `bytes` payload.
+        """
+        return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+    def decode(self, payload):
+        """Decode plain data.
+
+        :param payload: `bytes` payload.
+        :returns: plain data.
+        """
+        return json.loads(payload)
+
+
+class MsgpackCodec(object):
+
+    """MessagePack codec, requires `msgpack` package."""
+
+    name = 'msgpack'
+
+    def encode(self, data):
+        """Encode plain data.
+
+        :param data: plain data.
+        :returns: `bytes` payload.
+        """
+        return msgpack.packb(data, use_bin_type=True)
+
+    def decode(self, payload):
+        """Decode plain data.
+
+        :param payload: `bytes` payload.
+        :returns: plain data.
+        """
+        return msgpack.unpackb(payload, raw=False)
+
+
+class BinaryCodec(object):
+
+    """Compact length-prefixed binary codec without dependencies."""
+
+    name = 'binary'
+
+    LENGTH = struct.Struct('>I')
+    INTEGER = struct.Struct('>q')
+    FLOAT = struct.Struct('>d')
+
+    def encode(self, data):
+        """Encode plain data.
+
+        :param data: plain data.
+        :returns: `bytes` payload.
+        """
+        parts = []
+        self._encode(data, parts.append)
+        return b''.join(parts)
+
+    def _encode(self, value, write):
+        """Write tagged value."""
+        if value is None:
+            write(b'N')
+        elif value is True:
+            write(b'T')
+        elif value is False:
+            write(b'F')
+        elif isinstance(value, int):
+            write(b'I')
+            write(self.INTEGER.pack(value))
+        elif isinstance(value, float):
+            write(b'D')
+            write(self.FLOAT.pack(value))
+        elif isinstance(value, str):
+            value = value.encode('utf-8')
+            self._encode_size(b's', b'S', len(value), write)
+            write(value)
+        elif isinstance(value, (list, tuple)):
+            self._encode_size(b'l', b'L', len(value), write)
+            for item in value:
+                self._encode(item, write)
+        elif isinstance(value, dict):
+            self._encode_size(b'm', b'M', len(value), write)
+            for key, item in value.items():
+                self._encode(key, write)
+                self._encode(item, write)
+        else:
+            raise ValueError(
+                'Unsupported type: {}.'.format(type(value).__name__)
+            )
+
+    def _encode_size(self, short_tag, tag, size, write):
+        """Write tag with size, one byte size for short values."""
+        if size < 256:
+            write(short_tag)
+            write(bytes((size,)))
+        else:
+            write(tag)
+            write(self.LENGTH.pack(size))
+
+    def decode(self, payload):
+        """Decode plain data.
+
+        :param payload: `bytes` payload.
+        :returns: plain data.
+        """
+        value, offset = self._decode(memoryview(payload), 0)
+        if offset != len(payload):
+            raise ValueError('Trailing data in payload.')
+        return value
+
+    def _decode(self, payload, offset):
+        """Read tagged value.
+
+        :returns: `tuple` of value and next offset.
+        """
+        tag = payload[offset:offset + 1].tobytes()
+        offset += 1
+
+        if tag == b'N':
+            return None, offset
+        if tag == b'T':
+            return True, offset
+        if tag == b'F':
+            return False, offset
+        if tag == b'I':
+            return self.INTEGER.unpack_from(payload, offset)[0], offset + 8
+        if tag == b'D':
+            return self.FLOAT.unpack_from(payload, offset)[0], offset + 8
+
+        if tag in (b's', b'l', b'm'):
+            size = payload[offset]
+            offset += 1
+        elif tag in (b'S', b'L', b'M'):
+            size = self.LENGTH.unpack_from(payload, offset)[0]
+            offset += 4
+        else:
+            raise ValueError('Unknown tag {!r}.'.format(tag))
+
+        if tag in (b's', b'S'):
+            end = offset + size
+            return str(payload[offset:end], 'utf-8'), end
+
+        if tag in (b'l', b'L'):
+            items = []
+            for _ in range(size):
+                item, offset = self._decode(payload, offset)
+                items.append(item)
+            return items, offset
+
+        items = {}
+        for _ in range(size):
+            key, offset = self._decode(payload, offset)
+            items[key], offset = self._decode(payload, offset)
+        return items, offset
+
+
+codecs = {}
+
+
+def register(codec):
+    """Register codec by its name.
+
+    :param codec: codec instance with `name`, `encode` and `decode`.
+    :returns: codec instance.
+    """
+    codecs[codec.name] = codec
+    return codec
+
+
+def get_codec(name):
+    """Get registered codec.
+
+    :param name: `str` codec name.
+    :returns: codec instance.
+    """
+    try:
+        return codecs[name]
+    except KeyError:
+        raise ValueError('Unknown codec "{}".'.format(name))
+
+
+def encode(obj, codec='json'):
+    """Serialize object with codec.
+
+    :param obj: `entities.XMLObject` subclass instance.
+    :param codec (optional): `str` codec name.
+    :returns: `bytes` payload.
+    """
+    return get_codec(codec).encode(dump(obj))
+
+
+def decode(payload, codec='json'):
+    """Deserialize object with codec.
+
+    :param payload: `bytes` payload.
+    :param codec (optional): `str` codec name.
+    :returns: `entities.XMLObject` subclass instance.
+    """
+    return load(get_codec(codec).decode(payload))
+
+
+register(JSONCodec())
+register(BinaryCodec())
+if msgpack is not None:
+    register(MsgpackCodec())
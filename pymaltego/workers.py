@@ -0,0 +1,126 @@
+# coding=utf-8
+
+"""Process pool workers serializing entities themselves.
+
+Workers return serialized entities as raw bytes, through pipe or shared
+memory for large results, and parent process splices them into response
+as `entities.Fragment` instances without rebuilding objects.
+"""
+
+import collections
+from concurrent import futures
+
+from . import entities, serializers
+
+SHARED_MEMORY_THRESHOLD = 1024 * 1024
+
+
+def serialize(items):
+    """Serialize entities to XML fragment.
+
+    :param items: iterable of `entities.Entity` instances or entity nodes.
+    :returns: `tuple` of `bytes` XML and `int` count of entities.
+    """
+    parts = [serializers.object_xml(item) for item in items]
+    return ''.join(parts).encode('ascii', 'xmlcharrefreplace'), len(parts)
+
+
+def _run(func, item, threshold):
+    """Run function in worker and serialize its entities.
+
+    :returns: `tuple` of `bytes` XML or `str` shared memory name,
+        `int` size or `None` for XML passed through pipe and
+        `int` count of entities.
+    """
+    xml, count = serialize(func(item))
+    if threshold is None or len(xml) < threshold:
+        return xml, None, count
+
+    from multiprocessing import resource_tracker, shared_memory
+
+    memory = shared_memory.SharedMemory(create=True, size=len(xml))
+    try:
+        memory.buf[:len(xml)] = xml
+        # Parent process owns segment and unlinks it after reading.
+        resource_tracker.unregister(memory._name, 'shared_memory')
+        return memory.name, len(xml), count
+    finally:
+        memory.close()
+
+
+def receive(result):
+    """Load fragment sent by worker.
+
+    :param result: result of worker.
+    :returns: `entities.Fragment` instance.
+    """
+    payload, size, count = result
+    if size is None:
+        return entities.Fragment(payload, count)
+
+    from multiprocessing import shared_memory
+
+    memory = shared_memory.SharedMemory(name=payload)
+    try:
+        xml = bytes(memory.buf[:size])
+    finally:
+        memory.close()
+        memory.unlink()
+    return entities.Fragment(xml, count)
+
+
+class WorkerPool(object):
+
+    """Process pool of functions returning entities."""
+
+    def __init__(self, max_workers=None,
+                 shared_memory_threshold=SHARED_MEMORY_THRESHOLD,
+                 executor=None):
+        """Override initialization instance.
+
+        :param max_workers (optional): `int` count of processes.
+        :param shared_memory_threshold (optional): `int` min size in bytes
+            of result sent through shared memory, `None` always uses pipe.
+        :param executor (optional): `futures.ProcessPoolExecutor` instance,
+            created by default.
+        """
+        self.shared_memory_threshold = shared_memory_threshold
+        self.executor = executor or futures.ProcessPoolExecutor(max_workers)
+
+    def submit(self, func, item):
+        """Run function in worker.
+
+        :param func: picklable callable returning entities.
+        :param item: argument of function.
+        :returns: `futures.Future` of `tuple` result, see `receive`.
+        """
+        return self.executor.submit(
+            _run, func, item, self.shared_memory_threshold
+        )
+
+    def map(self, func, items):
+        """Run function for each item in workers.
+
+        :param func: picklable callable returning entities.
+        :param items: iterable of function arguments.
+        :returns: iterator of `entities.Fragment` instances in order
+            of items.
+        """
+        tasks = collections.deque(self.submit(func, item) for item in items)
+        try:
+            while tasks:
+                yield receive(tasks.popleft().result())
+        finally:
+            for task in tasks:
+                if not task.cancel() and task.exception() is None:
+                    receive(task.result())
+
+    def close(self):
+        """Shutdown worker processes."""
+        self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
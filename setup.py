@@ -27,6 +27,7 @@ setup(
     version=VERSION,
     packages=PACKAGES,
     install_requires=REQUIRES,
+    python_requires='>=3.8',
     description='Package for developing Maltego Transforms',
     long_description=LONG_DESCRIPTION,
     author='Vitalii Maslov',
@@ -39,5 +40,11 @@ setup(
         'Environment :: Web Environment',
         'Intended Audience :: Developers',
         'Programming Language :: Python',
+        'Programming Language :: Python :: 3',
+        'Programming Language :: Python :: 3 :: Only',
+        'Programming Language :: Python :: 3.8',
+        'Programming Language :: Python :: 3.9',
+        'Programming Language :: Python :: 3.10',
+        'Programming Language :: Python :: 3.11',
     ],
 )